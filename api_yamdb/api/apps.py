@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from reviews.models import Review, Title, TitleGenres
+        from .cache import invalidate_catalog
+        for model in (Title, TitleGenres, Review):
+            post_save.connect(invalidate_catalog, sender=model)
+            post_delete.connect(invalidate_catalog, sender=model)
+        m2m_changed.connect(invalidate_catalog, sender=Title.genre.through)
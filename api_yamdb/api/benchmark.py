@@ -0,0 +1,382 @@
+"""Нагрузочный замер публичных эндпоинтов API.
+
+seed() наполняет базу через модели reviews и users, run_benchmark()
+прогоняет запросы ко всем маршрутам из api.urls через тестовый клиент
+DRF (без сети) и возвращает словарь, пригодный для сохранения в JSON.
+Запускается командой bench_api или из pytest. run_json_benchmark()
+сравнивает рендереры и парсеры JSON (команда bench_json).
+"""
+import io
+import logging
+import platform
+import statistics
+import time
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from reviews.models import (Categories, Comment, Genres, Review, Title,
+                            TitleGenres)
+from reviews.rating import rebuild_ratings
+from users.constants import ADMIN
+from users.models import User
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .serializers import ReviewSerializer, ShowTitlesSerializer
+from .urls import router, urlpatterns
+
+SEED_BATCH_SIZE = 1000
+DEFAULT_DATASET = {
+    'titles': 1000,
+    'users': 100,
+    'reviews_per_title': 10,
+    'comments_per_review': 2,
+}
+GENRES_PER_TITLE = 2
+# Маршруты api.urls вне роутера, которые нельзя повторять с одними и теми
+# же данными, и причина пропуска.
+SKIPPED_ROUTES = {
+    'refresh_token': 'refresh-токен одноразовый: повтор получает 401',
+    'bulk_reviews': (
+        'повтор создаёт дубликаты и получает 400; '
+        'скорость замеряет bench_bulk_reviews'
+    ),
+}
+
+
+def seed(titles, users, reviews_per_title, comments_per_review):
+    """Создаёт набор данных заданного размера и возвращает администратора,
+    от имени которого выполняются запросы."""
+    if reviews_per_title > users:
+        raise ValueError('reviews_per_title не может превышать users')
+    admin = User.objects.create_user(
+        username='bench_admin', email='bench_admin@yamdb.fake', role=ADMIN
+    )
+    User.objects.bulk_create(
+        [
+            User(username=f'bench{idx}', email=f'bench{idx}@yamdb.fake')
+            for idx in range(users)
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    Categories.objects.bulk_create([
+        Categories(name=f'Категория {idx}', slug=f'category-{idx}')
+        for idx in range(5)
+    ])
+    Genres.objects.bulk_create([
+        Genres(name=f'Жанр {idx}', slug=f'genre-{idx}') for idx in range(10)
+    ])
+    categories = list(Categories.objects.values_list('pk', flat=True))
+    genres = list(Genres.objects.values_list('pk', flat=True))
+    authors = list(
+        User.objects.exclude(pk=admin.pk).values_list('pk', flat=True)
+    )
+    Title.objects.bulk_create(
+        [
+            Title(
+                name=f'Произведение {idx}',
+                year=1900 + idx % 120,
+                description=f'Описание произведения {idx}',
+                category_id=categories[idx % len(categories)],
+            )
+            for idx in range(titles)
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    title_ids = list(Title.objects.values_list('pk', flat=True))
+    TitleGenres.objects.bulk_create(
+        [
+            TitleGenres(
+                title_id=title_id,
+                genre_id=genres[(idx + shift) % len(genres)],
+            )
+            for idx, title_id in enumerate(title_ids)
+            for shift in range(GENRES_PER_TITLE)
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    Review.objects.bulk_create(
+        [
+            Review(
+                title_id=title_id,
+                author_id=authors[(idx + shift) % len(authors)],
+                text=f'Отзыв {shift} на произведение {title_id}',
+                score=(idx + shift) % 10 + 1,
+            )
+            for idx, title_id in enumerate(title_ids)
+            for shift in range(reviews_per_title)
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    Comment.objects.bulk_create(
+        [
+            Comment(
+                reviews_id=review_id,
+                author_id=authors[(review_id + shift) % len(authors)],
+                text=f'Комментарий {shift}',
+            )
+            for review_id in Review.objects.values_list('pk', flat=True)
+            for shift in range(comments_per_review)
+        ],
+        batch_size=SEED_BATCH_SIZE,
+    )
+    rebuild_ratings()
+    return admin
+
+
+def get_routes(admin):
+    """Возвращает список (имя, метод, путь, данные) для всех маршрутов
+    api.urls и список пропущенных маршрутов: GET для маршрутов, которые
+    его поддерживают, POST для регистрации и получения токена."""
+    review = Review.objects.order_by('pk').first()
+    comment = review.comments.order_by('pk').first()
+    nested = {'title_id': review.title_id, 'reviews_id': review.pk}
+    lookups = {
+        'titles': review.title_id,
+        'reviews': review.pk,
+        'comments': comment.pk,
+        'categories': Categories.objects.first().slug,
+        'genres': Genres.objects.first().slug,
+        'users': admin.username,
+    }
+    routes = []
+    skipped = []
+    for pattern in router.urls:
+        kwargs = pattern.pattern.regex.groupindex
+        if 'format' in kwargs:
+            continue
+        name = pattern.name
+        basename = name.rsplit('-', 1)[0]
+        values = {key: nested[key] for key in kwargs if key in nested}
+        for key in kwargs:
+            if key not in values:
+                values[key] = lookups[basename]
+        path = reverse(f'api:{name}', kwargs=values)
+        actions = getattr(pattern.callback, 'actions', {'get': 'get'})
+        if 'get' in actions:
+            routes.append((name, 'get', path, None))
+        else:
+            skipped.append({'name': name, 'path': path,
+                            'methods': sorted(actions)})
+    post_data = {
+        'sign_up': {'username': admin.username, 'email': admin.email},
+        'get_token': {
+            'username': admin.username, 'confirmation_code': 'invalid'
+        },
+    }
+    for pattern in urlpatterns:
+        name = getattr(pattern, 'name', None)
+        if name is None:
+            # include(router.urls) - маршруты роутера разобраны выше.
+            continue
+        path = reverse(f'api:{name}')
+        view = getattr(pattern.callback, 'view_class', None) or (
+            pattern.callback.cls
+        )
+        if name in post_data:
+            routes.append((name, 'post', path, post_data[name]))
+        elif name in SKIPPED_ROUTES:
+            skipped.append({
+                'name': name, 'path': path,
+                'methods': sorted(
+                    method for method in view.http_method_names
+                    if hasattr(view, method) and method != 'options'
+                ),
+                'reason': SKIPPED_ROUTES[name],
+            })
+        else:
+            routes.append((name, 'get', path, None))
+    return routes, skipped
+
+
+def measure(client, method, path, data, requests):
+    latencies = []
+    queries = []
+    statuses = {}
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            response = getattr(client, method)(path, data=data)
+            if response.streaming:
+                # Потоковый ответ формируется при чтении.
+                b''.join(response.streaming_content)
+            latencies.append(time.perf_counter() - start)
+        queries.append(len(context.captured_queries))
+        statuses[response.status_code] = (
+            statuses.get(response.status_code, 0) + 1
+        )
+    total = sum(latencies)
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method='inclusive')
+        p50, p90, p99 = cuts[49], cuts[89], cuts[98]
+    else:
+        p50 = p90 = p99 = latencies[0]
+    return {
+        'requests': requests,
+        'status': {str(code): count for code, count in statuses.items()},
+        'latency_ms': {
+            'mean': total / requests * 1000,
+            'p50': p50 * 1000,
+            'p90': p90 * 1000,
+            'p99': p99 * 1000,
+            'max': max(latencies) * 1000,
+        },
+        'throughput_rps': requests / total if total else None,
+        'queries': {'mean': statistics.mean(queries), 'max': max(queries)},
+    }
+
+
+def run_benchmark(admin, requests=50, warmup=5):
+    """Замеряет все маршруты и возвращает результаты в виде словаря."""
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    routes, skipped = get_routes(admin)
+    results = []
+    cache.clear()
+    # Ответы 4xx ожидаемы (например, неверный код подтверждения),
+    # предупреждения о них только засоряют вывод.
+    request_logger = logging.getLogger('django.request')
+    log_level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    email_backend = 'django.core.mail.backends.locmem.EmailBackend'
+    # Регистрация только ставит письмо в очередь; отправку фоновым
+    # потоком отключаем, чтобы она не конкурировала с замером за базу.
+    # Ограничения частоты и попыток ввода кода отключены: иначе замер
+    # получения токена и регистрации состоит из ответов 429.
+    rest_framework = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': dict.fromkeys(
+            settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {})
+        ),
+    }
+    try:
+        with override_settings(EMAIL_BACKEND=email_backend,
+                               EMAIL_OUTBOX_DELIVERY='worker',
+                               REST_FRAMEWORK=rest_framework,
+                               CONFIRMATION_CODE_MAX_ATTEMPTS=float('inf')):
+            for name, method, path, data in routes:
+                for _ in range(warmup):
+                    getattr(client, method)(path, data=data)
+                result = {
+                    'name': name, 'method': method.upper(), 'path': path
+                }
+                result.update(measure(client, method, path, data, requests))
+                results.append(result)
+    finally:
+        request_logger.setLevel(log_level)
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+        },
+        'dataset': {
+            'titles': Title.objects.count(),
+            'users': User.objects.count(),
+            'reviews': Review.objects.count(),
+            'comments': Comment.objects.count(),
+        },
+        'routes': results,
+        'skipped': skipped,
+    }
+
+
+def run_bulk_reviews_benchmark(admin, reviews_per_title):
+    """Создаёт по reviews_per_title отзывов на каждое произведение одним
+    запросом к /api/v1/reviews/bulk/ и возвращает скорость вставки."""
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(admin)}'
+    )
+    authors = list(
+        User.objects.exclude(pk=admin.pk).values_list('username', flat=True)
+    )
+    if reviews_per_title > len(authors):
+        raise ValueError('reviews_per_title не может превышать users')
+    payload = [
+        {
+            'title': title_id,
+            'author': authors[(idx + shift) % len(authors)],
+            'text': f'Отзыв {shift} на произведение {title_id}',
+            'score': (idx + shift) % 10 + 1,
+        }
+        for idx, title_id in enumerate(
+            Title.objects.values_list('pk', flat=True)
+        )
+        for shift in range(reviews_per_title)
+    ]
+    start = time.perf_counter()
+    response = client.post(
+        reverse('api:bulk_reviews'), data=payload, format='json'
+    )
+    seconds = time.perf_counter() - start
+    return {
+        'status': response.status_code,
+        'reviews': len(payload),
+        'seconds': seconds,
+        'reviews_per_second': len(payload) / seconds,
+    }
+
+
+def get_json_pages(items):
+    """Страницы произведений и отзывов по items элементов в том виде,
+    в каком их получает рендерер."""
+    titles = Title.objects.select_related('category').prefetch_related(
+        'genre'
+    ).order_by('pk')[:items]
+    reviews = Review.objects.select_related('author').order_by('pk')[:items]
+    return {
+        'titles': ShowTitlesSerializer(titles, many=True).data,
+        'reviews': ReviewSerializer(reviews, many=True).data,
+    }
+
+
+def time_calls(func, arg, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run_json_benchmark(items=1000, repeat=20):
+    """Сравнивает JSONRenderer/JSONParser с FastJSONRenderer/FastJSONParser
+    на страницах из items произведений и отзывов. Возвращает среднее
+    время одного вызова в миллисекундах."""
+    results = []
+    for name, results_page in get_json_pages(items).items():
+        page = {
+            'count': len(results_page),
+            'next': None,
+            'previous': None,
+            'results': results_page,
+        }
+        body = JSONRenderer().render(page)
+        if FastJSONRenderer().render(page) != body:
+            raise AssertionError(f'{name}: ответы рендереров различаются')
+        result = {'page': name, 'items': len(results_page),
+                  'bytes': len(body)}
+        for kind, stdlib, fast, arg in (
+            ('render', JSONRenderer().render, FastJSONRenderer().render,
+             page),
+            ('parse', lambda body: JSONParser().parse(io.BytesIO(body)),
+             lambda body: FastJSONParser().parse(io.BytesIO(body)), body),
+        ):
+            stdlib_ms = time_calls(stdlib, arg, repeat)
+            fast_ms = time_calls(fast, arg, repeat)
+            result[kind] = {
+                'json_ms': stdlib_ms,
+                'orjson_ms': fast_ms,
+                'speedup': stdlib_ms / fast_ms if fast_ms else None,
+            }
+        results.append(result)
+    return {'repeat': repeat, 'pages': results}
@@ -0,0 +1,217 @@
+import hashlib
+import time
+from functools import partial
+from threading import local
+from weakref import WeakValueDictionary
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.http import (http_date, parse_etags, parse_http_date_safe,
+                               quote_etag)
+
+# Набор данных списка произведений: меняется при записи произведений,
+# их жанров и отзывов.
+CATALOG = 'titles'
+# Списки, ответы которых кэшируются целиком (по basename вьюсетов).
+CACHED_LISTS = ('categories', 'genres', CATALOG)
+# Как часто ожидающий запрос проверяет, не появился ли ответ в кэше.
+LOCK_POLL_INTERVAL = 0.05
+
+# Сдвиги версий, которые ждут фиксации транзакции, по (алиас базы, имя
+# набора); у каждого потока свои соединения и свой словарь. Ссылку на
+# обработчик держит только очередь on_commit: при откате транзакции
+# Django её отбрасывает, и запись исчезает из словаря сама.
+_local = local()
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def is_local_cache():
+    """Кэш в памяти процесса: версии и ответы не видны другим
+    процессам (воркерам сервера, management-командам)."""
+    return isinstance(get_cache(), LocMemCache)
+
+
+def get_version(name):
+    """Текущая версия набора данных name.
+    Начальное значение берётся из часов, чтобы после очистки кэша
+    или перезапуска версии не повторяли уже выданные клиентам ETag.
+    """
+    cache = get_cache()
+    key = f'version:{name}'
+    cache.add(key, time.time_ns(), timeout=None)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        cache.set(key, version, timeout=None)
+    return version
+
+
+def bump_version(name):
+    """Делает недействительными все закэшированные ответы набора name."""
+    cache = get_cache()
+    key = f'version:{name}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def bump_version_on_commit(name):
+    """bump_version после фиксации текущей транзакции: до неё другие
+    запросы видят старые данные и не должны кэшировать их под новой
+    версией. Сколько бы записей ни было в транзакции, версия сдвигается
+    один раз.
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        bump_version(name)
+        return
+    pending = get_pending_bumps()
+    key = (connection.alias, name)
+    if key in pending:
+        return
+    bump = partial(_bump_pending, key)
+    pending[key] = bump
+    transaction.on_commit(bump)
+
+
+def get_pending_bumps():
+    pending = getattr(_local, 'pending_bumps', None)
+    if pending is None:
+        pending = _local.pending_bumps = WeakValueDictionary()
+    return pending
+
+
+def _bump_pending(key):
+    get_pending_bumps().pop(key, None)
+    bump_version(key[1])
+
+
+def invalidate_catalog(**kwargs):
+    """Обработчик сигналов записи произведений, их жанров и отзывов.
+    Массовые операции (bulk_create, update) сигналов не посылают -
+    после них версию CATALOG сдвигают явно."""
+    bump_version_on_commit(CATALOG)
+
+
+def get_or_compute(key, compute, timeout):
+    """Значение из кэша, а при промахе - результат compute(), который
+    сохраняется в кэш. Пересчитывает только запрос, взявший блокировку;
+    остальные ждут его результата не дольше API_CACHE_LOCK_WAIT секунд
+    и лишь затем считают сами. Возвращает пару (значение, попадание).
+    """
+    cache = get_cache()
+    value = cache.get(key)
+    if value is not None:
+        return value, True
+    lock = f'lock:{key}'
+    locked = cache.add(lock, True, settings.API_CACHE_LOCK_TIMEOUT)
+    deadline = time.monotonic() + settings.API_CACHE_LOCK_WAIT
+    while not locked and time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value = cache.get(key)
+        if value is not None:
+            return value, True
+        locked = cache.add(lock, True, settings.API_CACHE_LOCK_TIMEOUT)
+    try:
+        value = compute()
+        cache.set(key, value, timeout)
+    finally:
+        if locked:
+            cache.delete(lock)
+    return value, False
+
+
+def count_lookup(name, hit):
+    """Увеличивает общий для всех воркеров счётчик попаданий или
+    промахов кэша набора name."""
+    cache = get_cache()
+    key = f'stats:{name}:{"hits" if hit else "misses"}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_lookup_stats(names):
+    cache = get_cache()
+    stats = {}
+    for name in names:
+        counters = cache.get_many(
+            [f'stats:{name}:hits', f'stats:{name}:misses']
+        )
+        hits = counters.get(f'stats:{name}:hits', 0)
+        misses = counters.get(f'stats:{name}:misses', 0)
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / (hits + misses) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_lookup_stats(names):
+    get_cache().delete_many([
+        f'stats:{name}:{event}'
+        for name in names for event in ('hits', 'misses')
+    ])
+
+
+def make_cache_key(name, version, request):
+    """Ключ ответа: версия набора данных, адрес запроса и его параметры
+    в отсортированном виде (ссылки next/previous содержат хост)."""
+    query = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    raw = f'{request.build_absolute_uri(request.path)}?{query}'
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f'response:{name}:{version}:{digest}'
+
+
+def make_etag(cache_key):
+    return quote_etag(hashlib.md5(cache_key.encode()).hexdigest())
+
+
+def etag_matches(request, etag):
+    """Проверяет, есть ли etag в заголовке If-None-Match."""
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = [tag.replace('W/', '', 1) for tag in parse_etags(header)]
+    return '*' in etags or etag in etags
+
+
+def make_conditional_headers(name, updated_at, request):
+    """ETag и Last-Modified ответа, который меняется только вместе
+    с отметкой updated_at ресурса и параметрами запроса.
+    Last-Modified точен до секунды: пока секунда изменения не прошла,
+    в ней возможна ещё одна запись с тем же заголовком, поэтому до тех
+    пор он не отдаётся и клиент сверяет версию только по ETag.
+    """
+    stamp = updated_at.timestamp()
+    headers = {'ETag': make_etag(make_cache_key(name, stamp, request))}
+    if int(stamp) < int(time.time()):
+        headers['Last-Modified'] = http_date(stamp)
+    return headers
+
+
+def not_modified(request, headers):
+    """Условный GET: If-None-Match, а без него - If-Modified-Since."""
+    if request.META.get('HTTP_IF_NONE_MATCH'):
+        return etag_matches(request, headers['ETag'])
+    since = request.META.get('HTTP_IF_MODIFIED_SINCE')
+    if not since or 'Last-Modified' not in headers:
+        return False
+    since = parse_http_date_safe(since)
+    return (
+        since is not None
+        and parse_http_date_safe(headers['Last-Modified']) <= since
+    )
@@ -0,0 +1,72 @@
+"""Потоковая выгрузка каталога произведений в NDJSON.
+
+Строки читаются через QuerySet.iterator() пачками по chunk_size, для
+каждой пачки жанры загружаются одним запросом, а в ответ уходит пачка
+строк JSON. В памяти одновременно находится не больше одной пачки,
+сколько бы произведений ни было в базе. Пачка не больше, чем число
+параметров в запросе, которое допускает база: id пачки передаются
+в запрос жанров.
+"""
+import re
+from itertools import islice
+
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.utils.text import compress_sequence
+
+from .renderers import NDJSONRenderer
+from .row_serializers import TitleRowSerializer
+
+EXPORT_FILENAME = 'titles.ndjson'
+# Тот же разбор Accept-Encoding, что и в GZipMiddleware.
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
+
+def get_chunk_size(queryset, chunk_size):
+    """chunk_size, урезанный до числа id, которое база примет в одном
+    условии title__in (SQLite - не больше 999 параметров)."""
+    limit = connections[queryset.db].ops.bulk_batch_size(
+        [queryset.model._meta.pk], [None] * chunk_size
+    )
+    return max(min(chunk_size, limit), 1)
+
+
+def iter_ndjson(queryset, chunk_size):
+    """Пачки строк NDJSON в формате элементов списка /titles/."""
+    chunk_size = get_chunk_size(queryset, chunk_size)
+    renderer = NDJSONRenderer()
+    rows = TitleRowSerializer.get_rows(queryset).iterator(
+        chunk_size=chunk_size
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield b''.join(
+            renderer.render(item) for item in TitleRowSerializer(chunk).data
+        )
+
+
+def accepts_gzip(request):
+    return bool(ACCEPTS_GZIP_RE.search(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    ))
+
+
+def export_response(request, queryset, chunk_size):
+    """StreamingHttpResponse с каталогом; если клиент принимает gzip,
+    ответ сжимается по мере выгрузки."""
+    content = iter_ndjson(queryset.order_by('pk'), chunk_size)
+    gzip = accepts_gzip(request)
+    if gzip:
+        content = compress_sequence(content)
+    response = StreamingHttpResponse(
+        content, content_type=NDJSONRenderer.media_type
+    )
+    if gzip:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['Content-Disposition'] = (
+        f'attachment; filename="{EXPORT_FILENAME}"'
+    )
+    return response
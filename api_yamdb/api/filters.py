@@ -1,6 +1,7 @@
 from django_filters import rest_framework as filters
 
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(filters.FilterSet):
@@ -8,6 +9,7 @@ class TitleFilter(filters.FilterSet):
     year = filters.NumberFilter(field_name='year')
     genre = filters.CharFilter(field_name='genre__slug')
     category = filters.CharFilter(field_name='category__slug')
+    search = filters.CharFilter(method='filter_search')
 
     class Meta():
         model = Title
@@ -16,4 +18,10 @@ class TitleFilter(filters.FilterSet):
             'year',
             'genre',
             'category',
+            'search',
         )
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию с сортировкой
+        по релевантности; слова ищутся по префиксу."""
+        return search_titles(queryset, value)
@@ -0,0 +1,55 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.benchmark import DEFAULT_DATASET, run_benchmark, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки, пропускную способность и число SQL-запросов '
+        'для всех маршрутов API на отдельной тестовой базе и выводит '
+        'результат в JSON.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default in DEFAULT_DATASET.items():
+            parser.add_argument(
+                f'--{name.replace("_", "-")}', type=int, default=default
+            )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Количество замеряемых запросов на маршрут.',
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Количество прогревочных запросов на маршрут.',
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для результатов; по умолчанию - stdout.',
+        )
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            admin = seed(**{
+                name: options[name] for name in DEFAULT_DATASET
+            })
+            report = run_benchmark(
+                admin, options['requests'], options['warmup']
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        data = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(data)
+        else:
+            self.stdout.write(data)
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.benchmark import run_bulk_reviews_benchmark, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет скорость массового создания отзывов через '
+        '/api/v1/reviews/bulk/ на отдельной тестовой базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument(
+            '--reviews-per-title',
+            type=int,
+            default=10,
+            help='Количество отзывов на произведение в запросе.',
+        )
+
+    def handle(self, *args, **options):
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            admin = seed(
+                titles=options['titles'],
+                users=options['users'],
+                reviews_per_title=0,
+                comments_per_review=0,
+            )
+            report = run_bulk_reviews_benchmark(
+                admin, options['reviews_per_title']
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.benchmark import run_json_benchmark, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость стандартного и orjson-рендерера и парсера '
+        'на страницах произведений и отзывов на отдельной тестовой базе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--items',
+            type=int,
+            default=1000,
+            help='Количество элементов на странице.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Количество замеров каждого вызова.',
+        )
+
+    def handle(self, *args, **options):
+        items = options['items']
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seed(titles=items, users=1, reviews_per_title=1,
+                 comments_per_review=0)
+            report = run_json_benchmark(items, options['repeat'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
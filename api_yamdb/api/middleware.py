@@ -0,0 +1,55 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .timing import (RequestMetrics, current_metrics,
+                     install_serializer_timing, record)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """Считает SQL-запросы и время обработки каждого запроса, добавляет
+    заголовок Server-Timing и копит статистику по маршрутам.
+    При API_TIMING_ENABLED = False не подключается вовсе.
+    Должен стоять последним в MIDDLEWARE, чтобы время view не включало
+    остальные middleware.
+    """
+
+    def __init__(self, get_response):
+        if not settings.API_TIMING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        install_serializer_timing()
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(metrics.sql_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.view = time.perf_counter() - start
+            current_metrics.reset(token)
+        response['Server-Timing'] = metrics.server_timing()
+        match = request.resolver_match
+        if match is None:
+            return response
+        over_budget = metrics.queries > settings.API_QUERY_BUDGET
+        if over_budget:
+            logger.warning(
+                '%s %s: %d SQL-запросов при бюджете %d (%.1f мс)',
+                request.method, request.get_full_path(), metrics.queries,
+                settings.API_QUERY_BUDGET, metrics.view * 1000,
+            )
+        record((request.method, match.view_name), metrics, over_budget)
+        return response
@@ -1,11 +1,106 @@
+from functools import partial
+
+from django.conf import settings
+from rest_framework import status
 from rest_framework.mixins import (CreateModelMixin, DestroyModelMixin,
                                    ListModelMixin)
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from .cache import (bump_version_on_commit, count_lookup, etag_matches,
+                    get_or_compute, get_version, make_cache_key,
+                    make_conditional_headers, make_etag, not_modified)
+
+
+class CachedListMixin:
+    """Кэширует страницы списка целиком (ключ - версия набора данных и
+    отсортированные параметры запроса) и отдаёт их с ETag. Набор данных
+    по умолчанию совпадает с basename; после записи его версию сдвигает
+    invalidate_list_cache.
+    """
+    list_cache_name = None
+
+    def get_list_cache_name(self):
+        return self.list_cache_name or self.basename
+
+    def use_list_cache(self, request):
+        return True
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_list_cache(request):
+            return super().list(request, *args, **kwargs)
+        name = self.get_list_cache_name()
+        key = make_cache_key(name, get_version(name), request)
+        etag = make_etag(key)
+        if etag_matches(request, etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag}
+            )
+        get_response = partial(super().list, request, *args, **kwargs)
+        data, hit = get_or_compute(
+            key, lambda: get_response().data, settings.API_CACHE_TIMEOUT
+        )
+        count_lookup(name, hit)
+        return Response(data, headers={'ETag': etag})
+
+    def invalidate_list_cache(self):
+        bump_version_on_commit(self.get_list_cache_name())
+
 
 class GetListCreateDeleteMixin(
-    GenericViewSet, CreateModelMixin, ListModelMixin, DestroyModelMixin
+    CachedListMixin, GenericViewSet, CreateModelMixin, ListModelMixin,
+    DestroyModelMixin
 ):
-    """Кастомный класс для жанров и категорий."""
+    """Кастомный класс для жанров и категорий.
+    Страницы списка (в том числе с search=) кэшируются до ближайшего
+    создания или удаления объекта и отдаются с ETag.
+    """
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.invalidate_list_cache()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        self.invalidate_list_cache()
+
+
+class ConditionalGetMixin:
+    """Условный GET по отметке изменения ресурса: ETag (и Last-Modified,
+    когда он надёжен) в каждом ответе и 304 без сериализации, если ресурс
+    не изменился."""
+
+    def conditional_response(self, request, updated_at, view, *args,
+                             **kwargs):
+        """Вызывает view(*args, **kwargs), только если у клиента нет
+        актуальной версии ответа."""
+        headers = make_conditional_headers(
+            self.basename, updated_at, request
+        )
+        if not_modified(request, headers):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        response = view(*args, **kwargs)
+        for name, value in headers.items():
+            response[name] = value
+        return response
+
+
+class RowListMixin:
+    """list() через сериализатор строк из row_serializers вместо
+    ModelSerializer. Без row_serializer_class работает обычный list()."""
+    row_serializer_class = None
 
-    pass
+    def list(self, request, *args, **kwargs):
+        if self.row_serializer_class is None:
+            return super().list(request, *args, **kwargs)
+        rows = self.row_serializer_class.get_rows(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                self.row_serializer_class(page).data
+            )
+        return Response(self.row_serializer_class(rows).data)
@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class PubDateCursorPagination(CursorPagination):
+    """Пагинация по ключу (pub_date, id): глубокие страницы стоят столько же,
+    сколько первая, и не требуют COUNT(*)."""
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """По умолчанию - limit/offset, как раньше.
+    Если в запросе есть параметр cursor (для первой страницы - пустой),
+    используется PubDateCursorPagination, а ответ содержит next, previous
+    и results без count.
+    """
+    cursor_query_param = 'cursor'
+    cursor_class = PubDateCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -11,7 +11,7 @@ class IsAuthorOrReadOnly(permissions.BasePermission):
             return (request.method in permissions.SAFE_METHODS
                     or request.user.is_authenticated)
         return (request.method in permissions.SAFE_METHODS
-                or obj.author == request.user
+                or obj.author_id == request.user.pk
                 or request.user.is_moderator
                 or request.user.is_admin)
 
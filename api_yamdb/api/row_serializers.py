@@ -0,0 +1,94 @@
+"""Сериализаторы страниц списков только для чтения.
+
+ModelSerializer на каждый объект страницы проходит по полям и вложенным
+сериализаторам; на страницах в сотни строк это основная часть времени
+ответа. Здесь ответ собирается прямо из словарей QuerySet.values(), а
+жанры произведений загружаются одним запросом на страницу. Результат
+совпадает с ShowTitlesSerializer, ReviewSerializer и CommentSerializer.
+"""
+from collections import defaultdict
+
+from rest_framework import serializers
+
+from reviews.models import Genres, calculate_rating
+
+# Даты выводятся тем же полем DRF, что и в ModelSerializer.
+datetime_field = serializers.DateTimeField()
+
+
+class RowSerializer:
+    """values - поля для QuerySet.values(). Подклассы определяют
+    to_representation(row) - элемент ответа для одной строки."""
+    values = ()
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def get_rows(cls, queryset):
+        return queryset.prefetch_related(None).values(*cls.values)
+
+    @property
+    def data(self):
+        return [self.to_representation(row) for row in self.rows]
+
+
+class TitleRowSerializer(RowSerializer):
+    """Строки произведений в формате ShowTitlesSerializer."""
+    values = (
+        'id', 'name', 'year', 'rating_sum', 'review_count', 'description',
+        'category__name', 'category__slug',
+    )
+
+    @property
+    def data(self):
+        rows = list(self.rows)
+        self.genres = defaultdict(list)
+        # Тот же запрос, что и у prefetch_related('genre'): порядок
+        # жанров совпадает с ShowTitlesSerializer.
+        for title_id, name, slug in Genres.objects.filter(
+            title__in=[row['id'] for row in rows]
+        ).values_list('title', 'name', 'slug'):
+            self.genres[title_id].append({'name': name, 'slug': slug})
+        return [self.to_representation(row) for row in rows]
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'year': row['year'],
+            'rating': calculate_rating(row['rating_sum'], row['review_count']),
+            'description': row['description'],
+            'genre': self.genres.get(row['id'], []),
+            'category': None if row['category__slug'] is None else {
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+            },
+        }
+
+
+class ReviewRowSerializer(RowSerializer):
+    """Строки отзывов в формате ReviewSerializer."""
+    values = ('id', 'author__username', 'text', 'pub_date', 'score')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'author': row['author__username'],
+            'text': row['text'],
+            'pub_date': datetime_field.to_representation(row['pub_date']),
+            'score': row['score'],
+        }
+
+
+class CommentRowSerializer(RowSerializer):
+    """Строки комментариев в формате CommentSerializer."""
+    values = ('id', 'author__username', 'text', 'pub_date')
+
+    def to_representation(self, row):
+        return {
+            'id': row['id'],
+            'author': row['author__username'],
+            'text': row['text'],
+            'pub_date': datetime_field.to_representation(row['pub_date']),
+        }
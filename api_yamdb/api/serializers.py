@@ -1,12 +1,24 @@
-from django.db.models import Avg
+import re
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
+from rest_framework.settings import api_settings
 
+from reviews.constants import BULK_REVIEWS_BATCH_SIZE
 from reviews.models import Categories, Comment, Genres, Review, Title
+from reviews.rating import add_reviews_to_ratings, touch_titles
+from reviews.validators import is_valid_score
 from users.constants import CONF_CODE_MAX_LEN, EMAIL_MAX_LEN, USERNAME_MAX_LEN
 from users.models import User
 from users.validators import username_not_me_validator, username_validator
 
+NON_FIELD_ERRORS_KEY = api_settings.NON_FIELD_ERRORS_KEY
+# Символы, которые отклоняют валидаторы CharField.
+PROHIBITED_CHARS_RE = re.compile('[\x00\ud800-\udfff]')
+
 
 class CategoriesSerializer(serializers.ModelSerializer):
     """Сериализатор для категории."""
@@ -59,7 +71,7 @@ class ShowTitlesSerializer(serializers.ModelSerializer):
     """Сериализатор показа рейтинга для произведений."""
     category = CategoriesSerializer(read_only=True)
     genre = GenresSerializer(many=True, required=False)
-    rating = serializers.SerializerMethodField()
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         "Класс дополнен полем 'rating'."
@@ -74,16 +86,6 @@ class ShowTitlesSerializer(serializers.ModelSerializer):
             'category',
         )
 
-    def get_rating(self, instance):
-        "Метод расчета рейтинга произведения."
-        avg = instance.reviews.aggregate(Avg('score'))
-        rating = avg['score__avg']
-        if rating:
-            rating = int(rating)
-        else:
-            rating = None
-        return rating
-
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор для модели ревью."""
@@ -96,14 +98,168 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         if self.context['request'].method == 'POST':
-            reviewer = self.context['request'].user
-            title_id = self.context['view'].kwargs['title_id']
-            if Review.objects.filter(author=reviewer,
-                                     title_id=title_id).exists():
+            if self.context['view'].title.already_reviewed:
                 raise serializers.ValidationError('Повторное ревью запрещено')
         return data
 
 
+def parse_plain_review(item):
+    """Быстрая проверка типового отзыва без полей сериализатора.
+    Принимает только то, что принял бы и BulkReviewSerializer, и
+    возвращает данные в том же виде. Для всего остального возвращает
+    None - такой отзыв проверяет сериализатор и формирует ошибки.
+    """
+    if type(item) is not dict:
+        return None
+    title = item.get('title')
+    score = item.get('score')
+    text = item.get('text')
+    if (type(title) is not int or type(score) is not int
+            or not is_valid_score(score)
+            or type(text) is not str):
+        return None
+    text = text.strip()
+    if not text or PROHIBITED_CHARS_RE.search(text):
+        return None
+    data = {'title': title, 'text': text, 'score': score}
+    if 'author' in item:
+        author = item['author']
+        if type(author) is not str:
+            return None
+        author = author.strip()
+        if (not author or len(author) > USERNAME_MAX_LEN
+                or PROHIBITED_CHARS_RE.search(author)):
+            return None
+        data['author'] = author
+    return data
+
+
+def iter_batches(queryset, values, fields=1):
+    """Делит values на пачки, которые база примет в одном запросе к
+    queryset с fields условиями IN (SQLite - не больше 999 параметров)."""
+    values = list(values)
+    size = max(connections[queryset.db].ops.bulk_batch_size(
+        [queryset.model._meta.pk] * fields, values
+    ), 1)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class BulkReviewListSerializer(serializers.ListSerializer):
+    """Проверяет пачку отзывов целиком: произведения, авторов и
+    уникальность пар (автор, произведение) - по одному запросу на всю
+    пачку (или на каждую пачку параметров, которую примет база), а не
+    на каждый отзыв."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > settings.BULK_REVIEWS_MAX:
+            raise serializers.ValidationError({NON_FIELD_ERRORS_KEY: [
+                f'Не больше {settings.BULK_REVIEWS_MAX} отзывов за запрос'
+            ]})
+        items = self.parse_plain(data)
+        if items is None:
+            items = super().to_internal_value(data)
+        self.resolve_authors(items)
+        errors = self.find_conflicts(items)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def parse_plain(self, data):
+        if not isinstance(data, list) or not data:
+            return None
+        items = [parse_plain_review(item) for item in data]
+        return None if None in items else items
+
+    def resolve_authors(self, items):
+        """Добавляет author_id; для неизвестного username - None."""
+        usernames = {item['author'] for item in items if 'author' in item}
+        authors = {}
+        for batch in iter_batches(User.objects.all(), usernames):
+            authors.update(User.objects.filter(
+                username__in=batch
+            ).values_list('username', 'pk'))
+        default_author = self.context['request'].user.pk
+        for item in items:
+            item['author_id'] = (
+                authors.get(item['author']) if 'author' in item
+                else default_author
+            )
+
+    def find_conflicts(self, items):
+        """Возвращает список ошибок по отзывам (пустой словарь - ошибок
+        нет)."""
+        titles = set()
+        for batch in iter_batches(
+            Title.objects.all(), {item['title'] for item in items}
+        ):
+            titles.update(Title.objects.filter(pk__in=batch).values_list(
+                'pk', flat=True
+            ))
+        # Пара (автор, произведение) попадает в ту же пачку, что и её
+        # отзыв, поэтому декартово произведение пачки её не пропустит.
+        pairs = {
+            (item['author_id'], item['title']) for item in items
+            if item['author_id'] is not None and item['title'] in titles
+        }
+        existing = set()
+        for batch in iter_batches(Review.objects.all(), pairs, fields=2):
+            existing.update(Review.objects.filter(
+                author_id__in={author_id for author_id, _ in batch},
+                title_id__in={title_id for _, title_id in batch},
+            ).values_list('author_id', 'title_id'))
+        errors = []
+        for item in items:
+            error = {}
+            pair = (item['author_id'], item['title'])
+            if item['author_id'] is None:
+                error['author'] = ['Пользователь не найден']
+            if item['title'] not in titles:
+                error['title'] = ['Произведение не найдено']
+            if pair in existing:
+                error[NON_FIELD_ERRORS_KEY] = ['Повторное ревью запрещено']
+            existing.add(pair)
+            errors.append(error)
+        return errors
+
+    def create(self, validated_data):
+        reviews = [
+            Review(
+                title_id=item['title'],
+                author_id=item['author_id'],
+                text=item['text'],
+                score=item['score'],
+            )
+            for item in validated_data
+        ]
+        try:
+            with transaction.atomic():
+                Review.objects.bulk_create(
+                    reviews, batch_size=BULK_REVIEWS_BATCH_SIZE
+                )
+                add_reviews_to_ratings(reviews)
+        except IntegrityError:
+            # Параллельный запрос успел создать отзыв из этой пачки.
+            raise serializers.ValidationError({NON_FIELD_ERRORS_KEY: [
+                'Повторное ревью запрещено'
+            ]})
+        return reviews
+
+
+class BulkReviewSerializer(serializers.ModelSerializer):
+    """Сериализатор отзыва для массового создания. Без author отзыв
+    создаётся от имени автора запроса."""
+    title = serializers.IntegerField()
+    author = serializers.CharField(
+        required=False, max_length=USERNAME_MAX_LEN
+    )
+
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'text', 'score')
+        list_serializer_class = BulkReviewListSerializer
+
+
 class CommentSerializer(serializers.ModelSerializer):
     """Сериализатор для модели комментария."""
     author = SlugRelatedField(slug_field='username', read_only=True,
@@ -127,6 +283,17 @@ class UserSerializer(serializers.ModelSerializer):
             'role',
         )
 
+    def update(self, instance, validated_data):
+        """Имя пользователя есть в списках его отзывов, поэтому при
+        переименовании обновляются отметки изменения произведений."""
+        renamed = validated_data.get(
+            'username', instance.username
+        ) != instance.username
+        instance = super().update(instance, validated_data)
+        if renamed:
+            touch_titles(Title.objects.filter(reviews__author=instance))
+        return instance
+
 
 class UserProfileSerializer(UserSerializer):
     """Сериализатор модели User для профиля пользователя."""
@@ -146,25 +313,64 @@ class SignUpSerializer(serializers.Serializer):
         required=True,
     )
 
+    def get_conflicts(self, username, email):
+        """Одним запросом находит пользователей с таким username или email.
+        Возвращает (user, username_taken, email_taken), где user -
+        пользователь с обоими совпадающими полями или None.
+        """
+        matches = User.objects.filter(
+            Q(username=username) | Q(email=email)
+        )[:2]
+        user = None
+        username_taken = email_taken = False
+        for match in matches:
+            if match.username == username and match.email == email:
+                user = match
+            username_taken |= match.username == username
+            email_taken |= match.email == email
+        return user, username_taken, email_taken
+
+    def raise_conflict(self, username_taken, email_taken):
+        # Ключ задан явно: create() вызывается вне validate().
+        if username_taken:
+            raise serializers.ValidationError({NON_FIELD_ERRORS_KEY: [
+                'Пользователь с таким username уже существует'
+            ]})
+        if email_taken:
+            raise serializers.ValidationError({NON_FIELD_ERRORS_KEY: [
+                'Пользователь с таким email уже существует'
+            ]})
+
     def validate(self, data):
         """Запрещает пользователям присваивать себе имя me
         и использовать повторные username и email."""
-
-        if not User.objects.filter(
-            username=data.get('username'), email=data.get('email')
-        ).exists():
-            if User.objects.filter(username=data.get('username')):
-                raise serializers.ValidationError(
-                    'Пользователь с таким username уже существует'
-                )
-
-            if User.objects.filter(email=data.get('email')):
-                raise serializers.ValidationError(
-                    'Пользователь с таким email уже существует'
-                )
-
+        user, username_taken, email_taken = self.get_conflicts(
+            data.get('username'), data.get('email')
+        )
+        if user is None:
+            self.raise_conflict(username_taken, email_taken)
+        self.user = user
         return data
 
+    def create(self, validated_data):
+        """Возвращает найденного при проверке пользователя или создаёт
+        нового. Если параллельный запрос успел создать пользователя с
+        теми же данными, возвращает его, а при конфликте только по
+        username или email - ошибку проверки.
+        """
+        if self.user is not None:
+            return self.user
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data)
+        except IntegrityError:
+            user, username_taken, email_taken = self.get_conflicts(
+                validated_data['username'], validated_data['email']
+            )
+            if user is None:
+                self.raise_conflict(username_taken, email_taken)
+            return user
+
 
 class GetAuthTokenSerializer(serializers.Serializer):
     """Сериализатор для получения токена."""
@@ -176,3 +382,8 @@ class GetAuthTokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(
         required=True, max_length=CONF_CODE_MAX_LEN
     )
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """Сериализатор для обновления токена."""
+    refresh = serializers.CharField(required=True)
@@ -0,0 +1,88 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Ограничение частоты по скользящему окну на двух счётчиках.
+
+    Число запросов за последние duration секунд оценивается как
+    счётчик текущего интервала плюс счётчик предыдущего, взвешенный долей
+    предыдущего интервала, которая ещё попадает в окно. В отличие от
+    SimpleRateThrottle в кэше хранятся два числа на клиента, а не список
+    меток времени, и счётчик увеличивается атомарно через incr.
+    Счётчики хранятся в кэше STATE_CACHE_ALIAS: закэшированные ответы
+    API не могут их вытеснить и так обнулить ограничение.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[settings.STATE_CACHE_ALIAS]
+        self.wait_seconds = None
+
+    def get_rate(self):
+        """Ставка из DEFAULT_THROTTLE_RATES на момент запроса, а не
+        импорта, как в SimpleRateThrottle: её можно поменять или
+        отключить (None) через override_settings."""
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.now = self.timer()
+        position = self.now / self.duration
+        window = int(position)
+        elapsed = position - window
+        current_key = f'{self.key}:{window}'
+        previous_key = f'{self.key}:{window - 1}'
+        counts = self.cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+        if current + previous * (1 - elapsed) >= self.num_requests:
+            if current >= self.num_requests:
+                self.wait_seconds = (1 - elapsed) * self.duration
+            else:
+                share = 1 - (self.num_requests - current) / previous
+                self.wait_seconds = (share - elapsed) * self.duration
+            return self.throttle_failure()
+        # Счётчик нужен, пока интервал остаётся текущим или предыдущим.
+        self.cache.add(current_key, 0, timeout=2 * self.duration)
+        try:
+            self.cache.incr(current_key)
+        except ValueError:
+            self.cache.set(current_key, 1, timeout=2 * self.duration)
+        return True
+
+    def wait(self):
+        return max(self.wait_seconds or 0, 0)
+
+
+class SignUpIPThrottle(SlidingWindowThrottle):
+    """Регистрации с одного IP-адреса."""
+    scope = 'signup_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class SignUpEmailThrottle(SlidingWindowThrottle):
+    """Регистрации на один адрес эл. почты, с любых IP-адресов."""
+    scope = 'signup_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        # Адрес может быть длиннее допустимого ключа memcached.
+        ident = hashlib.md5(email.strip().lower().encode()).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
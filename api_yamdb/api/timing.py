@@ -0,0 +1,122 @@
+"""Сбор метрик запросов: число и время SQL, время сериализации и view.
+
+Метрики текущего запроса хранятся в contextvar, агрегаты по маршрутам -
+в памяти процесса (у каждого воркера свои).
+"""
+import time
+from contextvars import ContextVar
+from threading import Lock
+
+from rest_framework import serializers
+
+from .row_serializers import RowSerializer
+
+current_metrics = ContextVar('current_metrics', default=None)
+
+_stats = {}
+_stats_lock = Lock()
+
+
+class RequestMetrics:
+    __slots__ = ('queries', 'sql', 'serializer', 'view', '_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql = 0.0
+        self.serializer = 0.0
+        self.view = 0.0
+        self._depth = 0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """Обёртка для connection.execute_wrapper."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql += time.perf_counter() - start
+            self.queries += 1
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.sql * 1000:.2f};desc="{self.queries} queries", '
+            f'serializer;dur={self.serializer * 1000:.2f}, '
+            f'view;dur={self.view * 1000:.2f}'
+        )
+
+
+def _timed_data(prop):
+    """Оборачивает свойство data сериализатора. Вложенные сериализаторы
+    не учитываются повторно: время считается только на внешнем уровне."""
+    getter = prop.fget
+
+    def data(self):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return getter(self)
+        metrics._depth += 1
+        start = time.perf_counter()
+        try:
+            return getter(self)
+        finally:
+            metrics._depth -= 1
+            if not metrics._depth:
+                metrics.serializer += time.perf_counter() - start
+
+    data.timed = True
+    return property(data)
+
+
+def install_serializer_timing():
+    for cls in (serializers.Serializer, serializers.ListSerializer,
+                RowSerializer):
+        if not getattr(cls.data.fget, 'timed', False):
+            cls.data = _timed_data(cls.data)
+
+
+def record(key, metrics, budget_exceeded):
+    with _stats_lock:
+        stats = _stats.setdefault(key, {
+            'requests': 0,
+            'queries_total': 0,
+            'queries_max': 0,
+            'sql_ms_total': 0.0,
+            'serializer_ms_total': 0.0,
+            'view_ms_total': 0.0,
+            'view_ms_max': 0.0,
+            'over_budget': 0,
+        })
+        stats['requests'] += 1
+        stats['queries_total'] += metrics.queries
+        stats['queries_max'] = max(stats['queries_max'], metrics.queries)
+        stats['sql_ms_total'] += metrics.sql * 1000
+        stats['serializer_ms_total'] += metrics.serializer * 1000
+        stats['view_ms_total'] += metrics.view * 1000
+        stats['view_ms_max'] = max(stats['view_ms_max'], metrics.view * 1000)
+        stats['over_budget'] += budget_exceeded
+
+
+def get_stats():
+    """Агрегаты по маршрутам со средними значениями."""
+    with _stats_lock:
+        snapshot = {key: dict(value) for key, value in _stats.items()}
+    result = []
+    for (method, view_name), stats in sorted(snapshot.items()):
+        requests = stats['requests']
+        result.append({
+            'method': method,
+            'view': view_name,
+            'requests': requests,
+            'queries_avg': stats['queries_total'] / requests,
+            'queries_max': stats['queries_max'],
+            'sql_ms_avg': stats['sql_ms_total'] / requests,
+            'serializer_ms_avg': stats['serializer_ms_total'] / requests,
+            'view_ms_avg': stats['view_ms_total'] / requests,
+            'view_ms_max': stats['view_ms_max'],
+            'over_budget': stats['over_budget'],
+        })
+    return result
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
@@ -1,8 +1,9 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CategoriesViewSet, CommentViewSet, GenresViewSet,
-                    GetAuthTokenApiView, ReviewViewSet, TitleViewSet,
+from .views import (BulkReviewApiView, CategoriesViewSet, CommentViewSet,
+                    GenresViewSet, GetAuthTokenApiView, RefreshTokenApiView,
+                    RequestStatsApiView, ReviewViewSet, TitleViewSet,
                     UserViewSet, sign_up)
 
 app_name = 'api'
@@ -27,4 +28,11 @@ urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/signup/', sign_up, name='sign_up'),
     path('v1/auth/token/', GetAuthTokenApiView.as_view(), name='get_token'),
+    path(
+        'v1/auth/token/refresh/',
+        RefreshTokenApiView.as_view(),
+        name='refresh_token',
+    ),
+    path('v1/reviews/bulk/', BulkReviewApiView.as_view(), name='bulk_reviews'),
+    path('v1/stats/', RequestStatsApiView.as_view(), name='stats'),
 ]
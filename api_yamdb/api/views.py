@@ -1,29 +1,62 @@
-from django.contrib.auth.tokens import default_token_generator
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, prefetch_related_objects
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters import rest_framework as myfilters
 from rest_framework import filters, status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (action, api_view, permission_classes,
+                                       throttle_classes)
+from rest_framework.exceptions import Throttled
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 from reviews.models import Categories, Comment, Genres, Review, Title
+from reviews.rating import (change_title_rating, rebuild_ratings,
+                            touch_titles)
 from users.models import User
-from users.registration.confirmation import send_confirmation_code
-from users.registration.token_generator import get_token_for_user
+from users.registration.confirmation import (attempts_exceeded,
+                                             redeem_confirmation_code,
+                                             register_failed_attempt,
+                                             request_confirmation_code)
+from users.registration.token_generator import (get_token_for_user,
+                                                refresh_token_pair)
+from .cache import (CACHED_LISTS, CATALOG, bump_version_on_commit,
+                    get_lookup_stats, reset_lookup_stats)
+from .export import export_response
 from .filters import TitleFilter
-from .mixins import GetListCreateDeleteMixin
+from .mixins import (CachedListMixin, ConditionalGetMixin,
+                     GetListCreateDeleteMixin, RowListMixin)
+from .pagination import LimitOffsetOrCursorPagination
 from .permissions import IsAdminOrReadOnly, IsAdmin, IsAuthorOrReadOnly
-from .serializers import (CategoriesSerializer, CommentSerializer,
-                          CreateUpdateTitleSerializer, ShowTitlesSerializer,
-                          GenresSerializer, GetAuthTokenSerializer,
+from .renderers import FastJSONRenderer, NDJSONRenderer
+from .row_serializers import (CommentRowSerializer, ReviewRowSerializer,
+                              TitleRowSerializer)
+from .serializers import (BulkReviewSerializer, CategoriesSerializer,
+                          CommentSerializer, CreateUpdateTitleSerializer,
+                          ShowTitlesSerializer, GenresSerializer,
+                          GetAuthTokenSerializer, RefreshTokenSerializer,
                           ReviewSerializer, SignUpSerializer,
                           UserProfileSerializer, UserSerializer)
+from .throttling import SignUpEmailThrottle, SignUpIPThrottle
+from .timing import get_stats, reset_stats
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+def get_author(user):
+    """Автор нового отзыва или комментария. Для ClaimsUser собирается из
+    претензий токена: сериализатору нужны только id и username, и после
+    сохранения автор не загружается из базы повторно."""
+    if isinstance(user, User):
+        return user
+    return User(pk=user.pk, username=user.username)
+
+
+class ReviewViewSet(RowListMixin, ConditionalGetMixin,
+                    viewsets.ModelViewSet):
     """
     Получить список всех отзывов.
     Добавление нового отзыва.
@@ -32,20 +65,87 @@ class ReviewViewSet(viewsets.ModelViewSet):
     """
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    row_serializer_class = ReviewRowSerializer
     permission_classes = (IsAuthorOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
 
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+    @cached_property
+    def title(self):
+        """Произведение из URL; ищется один раз за запрос.
+        Для POST заодно отмечает, есть ли уже отзыв текущего пользователя,
+        чтобы сериализатор не делал для этого отдельный запрос.
+        """
+        queryset = Title.objects.all()
+        if self.request.method == 'POST':
+            queryset = queryset.annotate(already_reviewed=Exists(
+                Review.objects.filter(
+                    title_id=OuterRef('pk'), author_id=self.request.user.pk
+                )
+            ))
+        return get_object_or_404(queryset, pk=self.kwargs.get('title_id'))
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        if self.detail:
+            # Отзыв ищется сразу с условием на произведение: чужое или
+            # несуществующее произведение даёт 404 без отдельного запроса.
+            title_id = self.kwargs.get('title_id')
+        else:
+            # Для списка несуществующее произведение - это 404, а не пустой
+            # список, поэтому оно ищется до фильтрации отзывов.
+            title_id = self.title.pk
+        return Review.objects.filter(
+            title_id=title_id
+        ).select_related('author')
 
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            request, self.title.updated_at, super().list,
+            request, *args, **kwargs
+        )
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        review = serializer.save(
+            author=get_author(self.request.user), title=self.title
+        )
+        change_title_rating(review.title_id, review.score, 1)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_score = Review.objects.select_for_update().values_list(
+            'score', flat=True
+        ).get(pk=serializer.instance.pk)
+        review = serializer.save()
+        change_title_rating(review.title_id, review.score - old_score)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        change_title_rating(instance.title_id, -instance.score, -1)
+        instance.delete()
+
+
+class BulkReviewApiView(APIView):
+    """Массовое создание отзывов для инструментов импорта.
+    Принимает список отзывов к одному или нескольким произведениям;
+    пачка создаётся целиком или не создаётся вовсе.
+    """
+    permission_classes = (IsAdmin,)
 
+    def post(self, request):
+        serializer = BulkReviewSerializer(
+            data=request.data, many=True, allow_empty=False,
+            context={'request': request},
+        )
+        serializer.is_valid(raise_exception=True)
+        reviews = serializer.save()
+        # bulk_create не посылает сигналов.
+        bump_version_on_commit(CATALOG)
+        return Response(
+            {'created': len(reviews)}, status=status.HTTP_201_CREATED
+        )
 
-class CommentViewSet(viewsets.ModelViewSet):
+
+class CommentViewSet(RowListMixin, viewsets.ModelViewSet):
     """
     Получить список всех комментариев.
     Добавление нового комментария к отзыву.
@@ -55,22 +155,50 @@ class CommentViewSet(viewsets.ModelViewSet):
     """
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    row_serializer_class = CommentRowSerializer
     permission_classes = (IsAuthorOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = LimitOffsetOrCursorPagination
 
-    def get_reviews(self):
-        return get_object_or_404(Review, pk=self.kwargs.get('reviews_id'))
+    @cached_property
+    def review(self):
+        """Отзыв из URL, принадлежащий произведению из URL; ищется один раз
+        за запрос."""
+        return get_object_or_404(
+            Review.objects.only('pk', 'title_id'),
+            pk=self.kwargs.get('reviews_id'),
+            title_id=self.kwargs.get('title_id'),
+        )
 
     def get_queryset(self):
-        return self.get_reviews().comments.all()
+        if self.detail:
+            # Комментарий ищется сразу с условием на отзыв и произведение.
+            queryset = Comment.objects.filter(
+                reviews_id=self.kwargs.get('reviews_id'),
+                reviews__title_id=self.kwargs.get('title_id'),
+            )
+        else:
+            # Для списка отзыв (и его принадлежность произведению)
+            # проверяется до фильтрации: иначе вместо 404 - пустой список.
+            queryset = Comment.objects.filter(reviews_id=self.review.pk)
+        return queryset.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, reviews=self.get_reviews())
+        serializer.save(
+            author=get_author(self.request.user), reviews=self.review
+        )
 
 
-class TitleViewSet(viewsets.ModelViewSet):
-    """Вьюсет для произведения(ий)."""
-    queryset = Title.objects.all()
+class TitleViewSet(CachedListMixin, RowListMixin, ConditionalGetMixin,
+                   viewsets.ModelViewSet):
+    """Вьюсет для произведения(ий).
+    Список для анонимных запросов кэшируется целиком по параметрам
+    фильтров и пагинации до ближайшей записи в каталог (CATALOG).
+    """
+    list_cache_name = CATALOG
+    row_serializer_class = TitleRowSerializer
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     serializer_class = CreateUpdateTitleSerializer
     pagination_class = LimitOffsetPagination
     permission_classes = (IsAdminOrReadOnly,)
@@ -87,6 +215,38 @@ class TitleViewSet(viewsets.ModelViewSet):
             return ShowTitlesSerializer
         return CreateUpdateTitleSerializer
 
+    def use_list_cache(self, request):
+        return not request.user.is_authenticated
+
+    @action(
+        detail=False,
+        permission_classes=(IsAdmin,),
+        renderer_classes=(FastJSONRenderer, NDJSONRenderer),
+    )
+    def export(self, request):
+        """Все произведения (с учётом фильтров) в NDJSON, по строке
+        на произведение; с Accept-Encoding: gzip - в сжатом виде."""
+        return export_response(
+            request, self.filter_queryset(self.get_queryset()),
+            settings.TITLES_EXPORT_CHUNK_SIZE,
+        )
+
+    def get_queryset(self):
+        if self.action == 'retrieve':
+            # Жанры нужны, только если ответ не 304: их подгружает show.
+            return self.queryset.prefetch_related(None)
+        return self.queryset
+
+    def retrieve(self, request, *args, **kwargs):
+        title = self.get_object()
+        return self.conditional_response(
+            request, title.updated_at, self.show, title
+        )
+
+    def show(self, title):
+        prefetch_related_objects([title], 'genre')
+        return Response(self.get_serializer(title).data)
+
 
 class CategoriesViewSet(GetListCreateDeleteMixin):
     """Вьюсет для категории."""
@@ -98,6 +258,15 @@ class CategoriesViewSet(GetListCreateDeleteMixin):
     search_fields = ('name',)
     lookup_field = 'slug'
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Удаление категории меняет ответы её произведений, поэтому
+        их отметки изменения обновляются."""
+        touch_titles(Title.objects.filter(category=instance))
+        super().perform_destroy(instance)
+        # Категория снимается с произведений через UPDATE без сигналов.
+        bump_version_on_commit(CATALOG)
+
 
 class GenresViewSet(GetListCreateDeleteMixin):
     """Вьюсет для жанра."""
@@ -109,6 +278,13 @@ class GenresViewSet(GetListCreateDeleteMixin):
     search_fields = ('name',)
     lookup_field = 'slug'
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Удаление жанра меняет ответы его произведений, поэтому
+        их отметки изменения обновляются."""
+        touch_titles(Title.objects.filter(genre=instance))
+        super().perform_destroy(instance)
+
 
 class UserViewSet(ModelViewSet):
     """Вьюсет модели User."""
@@ -120,14 +296,25 @@ class UserViewSet(ModelViewSet):
     lookup_field = 'username'
     http_method_names = ['get', 'post', 'delete', 'patch']
 
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        """Удаляет пользователя и пересчитывает рейтинги произведений,
+        на которые он оставлял отзывы."""
+        title_ids = list(instance.reviews.values_list('title_id', flat=True))
+        instance.delete()
+        rebuild_ratings(Title.objects.filter(pk__in=title_ids))
+
     @action(
         methods=['patch', 'get'],
         detail=False,
         permission_classes=(IsAuthenticated,),
     )
     def me(self, request):
+        user = request.user
+        if not isinstance(user, User):
+            user = get_object_or_404(User, pk=user.pk)
         serializer = UserProfileSerializer(
-            request.user, partial=True, data=request.data
+            user, partial=True, data=request.data
         )
         serializer.is_valid(raise_exception=True)
         if request.method == "PATCH":
@@ -135,15 +322,43 @@ class UserViewSet(ModelViewSet):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+class RequestStatsApiView(APIView):
+    """Статистика SQL-запросов и времени обработки по маршрутам
+    и попаданий в кэш ответов списков."""
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return Response({
+            'enabled': settings.API_TIMING_ENABLED,
+            'query_budget': settings.API_QUERY_BUDGET,
+            'routes': get_stats(),
+            'response_cache': get_lookup_stats(CACHED_LISTS),
+        })
+
+    def delete(self, request):
+        reset_stats()
+        reset_lookup_stats(CACHED_LISTS)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class GetAuthTokenApiView(APIView):
-    """CBV для получения и обновления токена."""
+    """CBV для получения и обновления токена.
+    Верный код проверяется по кэшу без обращения к базе.
+    """
     def post(self, request):
         serializer = GetAuthTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         username = serializer.validated_data.get('username')
         confirmation_code = serializer.validated_data.get('confirmation_code')
-        user = get_object_or_404(User, username=username)
-        if not default_token_generator.check_token(user, confirmation_code):
+        if attempts_exceeded(username):
+            raise Throttled(detail=(
+                'Превышено число попыток ввода кода, запросите новый код'
+            ))
+        user = redeem_confirmation_code(username, confirmation_code)
+        if user is None:
+            register_failed_attempt(
+                get_object_or_404(User, username=username)
+            )
             return Response(
                 {'confirmation_code': ['Неверный код подтверждения']},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -151,14 +366,34 @@ class GetAuthTokenApiView(APIView):
         return Response(get_token_for_user(user), status=status.HTTP_200_OK)
 
 
+class RefreshTokenApiView(APIView):
+    """CBV для обновления пары токенов по refresh-токену.
+    Заголовок Authorization не проверяется: обычно к этому моменту
+    access-токен уже истёк.
+    """
+    authentication_classes = ()
+
+    def get_authenticate_header(self, request):
+        # Без него DRF отвечает на InvalidToken статусом 403, а не 401.
+        return 'Bearer realm="api"'
+
+    def post(self, request):
+        serializer = RefreshTokenSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            tokens = refresh_token_pair(serializer.validated_data['refresh'])
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        return Response(tokens, status=status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([SignUpIPThrottle, SignUpEmailThrottle])
 def sign_up(request):
     """Добавление нового пользователя"""
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
-    email = serializer.data['email']
-    username = serializer.data['username']
-    user, _ = User.objects.get_or_create(email=email, username=username)
-    send_confirmation_code(user)
+    user = serializer.save()
+    request_confirmation_code(user)
     return Response(serializer.data, status=status.HTTP_200_OK)
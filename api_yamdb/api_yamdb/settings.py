@@ -33,6 +33,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.RequestTimingMiddleware',
 ]
 
 ROOT_URLCONF = 'api_yamdb.urls'
@@ -65,6 +66,44 @@ DATABASES = {
     }
 }
 
+# Кэш в памяти годится для одного процесса. Если воркеров несколько
+# или каталог загружается командой load_csv при запущенном сервере,
+# нужен общий бэкенд (Redis, memcached): версии закэшированных списков
+# сдвигаются в кэше, и сброс из другого процесса до LocMemCache не дойдёт.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Состояние, потеря которого ломает вход или защиту от перебора: коды
+    # подтверждения, счётчики попыток и ограничений частоты. Ответы API сюда не пишутся и вытеснить его
+    # не могут; записи удаляются только по истечении срока. В работе с
+    # несколькими воркерами здесь обязателен общий бэкенд без вытеснения
+    # (например, Redis с maxmemory-policy noeviction).
+    'state': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'state',
+        'OPTIONS': {'MAX_ENTRIES': 10 ** 9},
+    },
+}
+
+API_CACHE_ALIAS = 'default'
+STATE_CACHE_ALIAS = 'state'
+API_CACHE_TIMEOUT = 300
+# Промах по закэшированному списку пересчитывает один запрос: он держит
+# блокировку не дольше API_CACHE_LOCK_TIMEOUT секунд, остальные ждут
+# его результат до API_CACHE_LOCK_WAIT секунд.
+API_CACHE_LOCK_TIMEOUT = 10
+API_CACHE_LOCK_WAIT = 2
+
+# Наибольшее число отзывов в одном запросе к /api/v1/reviews/bulk/.
+BULK_REVIEWS_MAX = 10000
+# Сколько произведений читается из базы за раз при выгрузке
+# /api/v1/titles/export/.
+TITLES_EXPORT_CHUNK_SIZE = 1000
+
+API_TIMING_ENABLED = False
+API_QUERY_BUDGET = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -85,14 +124,30 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.StatelessJWTAuthentication',
+    ],
+    # orjson, если установлен; без него - стандартный json.
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '60/hour',
+        'signup_email': '5/hour',
+    },
 }
 
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=3),
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=15),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
+    'ROTATE_REFRESH_TOKENS': True,
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
@@ -100,6 +155,26 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 DEFAULT_FROM_EMAIL = 'yamdb@yandex.ru'
 
+# Очередь писем (users.registration.outbox): 'thread' - пул потоков в
+# процессе веб-сервера, 'worker' - отдельный процесс send_outbox,
+# 'sync' - отправка сразу после коммита.
+EMAIL_OUTBOX_DELIVERY = 'thread'
+EMAIL_OUTBOX_THREADS = 1
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_LEASE = 300
+# Соединение с почтовым сервером, простоявшее дольше, переоткрывается.
+EMAIL_DISPATCH_IDLE_TIMEOUT = 60
+
+# Повторная регистрация в течение этого времени не отправляет новое
+# письмо: код из уже поставленного в очередь письма остаётся верным.
+# Не больше CONFIRMATION_CODE_TIMEOUT, иначе повторная регистрация может
+# не прислать код взамен истёкшего.
+SIGNUP_COALESCE_TIMEOUT = 300
+
+CONFIRMATION_CODE_TIMEOUT = 15 * 60
+CONFIRMATION_CODE_MAX_ATTEMPTS = 5
+
 AUTH_USER_MODEL = 'users.User'
 
 LANGUAGE_CODE = 'ru'
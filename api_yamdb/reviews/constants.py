@@ -1,2 +1,8 @@
 NAME_MAX_LEN = 256
 SLUG_MAX_LEN = 50
+MIN_SCORE = 0
+MAX_SCORE = 10
+CSV_BATCH_SIZE = 1000
+CSV_CHUNK_SIZE = 4 * 1024 * 1024
+CSV_CHUNKS_PER_WORKER = 2
+BULK_REVIEWS_BATCH_SIZE = 1000
@@ -0,0 +1,311 @@
+import csv
+import io
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+import django
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+
+from users.models import User
+from .constants import CSV_BATCH_SIZE, CSV_CHUNK_SIZE, CSV_CHUNKS_PER_WORKER
+from .models import Categories, Comment, Genres, Review, Title, TitleGenres
+from .rating import rebuild_ratings
+
+DATA_DIR = settings.BASE_DIR / 'static' / 'data'
+
+Dataset = namedtuple(
+    'Dataset', ('filename', 'model', 'columns', 'key', 'post_load',
+                'truncate'),
+    defaults=(True,),
+)
+LoadResult = namedtuple(
+    'LoadResult', ('dataset', 'rows', 'created', 'updated', 'seconds')
+)
+
+# Порядок важен: каждый файл ссылается только на уже загруженные таблицы.
+# columns: столбец CSV -> имя поля модели; key: поле, по которому
+# строка CSV сопоставляется с записью в базе в режиме upsert;
+# truncate=False: таблица очищается только с replace=True, иначе
+# загружается как при upsert (пользователей, которых нет в CSV,
+# в том числе администраторов, загрузка не удаляет).
+DATASETS = (
+    Dataset('users.csv', User, {
+        'id': 'id',
+        'username': 'username',
+        'email': 'email',
+        'role': 'role',
+        'bio': 'bio',
+        'first_name': 'first_name',
+        'last_name': 'last_name',
+    }, 'id', None, truncate=False),
+    Dataset('category.csv', Categories, {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+    }, 'slug', None),
+    Dataset('genre.csv', Genres, {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+    }, 'slug', None),
+    Dataset('titles.csv', Title, {
+        'id': 'id',
+        'name': 'name',
+        'year': 'year',
+        'category': 'category',
+    }, 'id', None),
+    Dataset('genre_title.csv', TitleGenres, {
+        'id': 'id',
+        'title_id': 'title',
+        'genre_id': 'genre',
+    }, 'id', None),
+    Dataset('review.csv', Review, {
+        'id': 'id',
+        'title_id': 'title',
+        'text': 'text',
+        'author': 'author',
+        'score': 'score',
+        'pub_date': 'pub_date',
+    }, 'id', rebuild_ratings),
+    Dataset('comments.csv', Comment, {
+        'id': 'id',
+        'review_id': 'reviews',
+        'text': 'text',
+        'author': 'author',
+        'pub_date': 'pub_date',
+    }, 'id', None),
+)
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    """Отключает auto_now_add, чтобы сохранить даты из CSV."""
+    fields = [
+        field for field in model._meta.local_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def make_row_parser(dataset):
+    """Возвращает функцию, превращающую строку CSV в словарь значений
+    полей модели (ключи - attname)."""
+    fields = {
+        column: dataset.model._meta.get_field(name)
+        for column, name in dataset.columns.items()
+    }
+    now = timezone.now()
+
+    def parse(row):
+        values = {}
+        for column, field in fields.items():
+            value = row[column]
+            if value == '':
+                if getattr(field, 'auto_now_add', False):
+                    value = now
+                elif field.null:
+                    value = None
+            else:
+                value = field.to_python(value)
+            values[field.attname] = value
+        return values
+
+    return parse
+
+
+def read_batches(path, dataset, batch_size):
+    """Читает файл потоком и отдаёт списки объектов длиной batch_size."""
+    parse = make_row_parser(dataset)
+    with open(path, encoding='utf-8', newline='') as file:
+        objs = (dataset.model(**parse(row)) for row in csv.DictReader(file))
+        while True:
+            batch = list(islice(objs, batch_size))
+            if not batch:
+                return
+            yield batch
+
+
+def find_chunks(path, chunk_size=CSV_CHUNK_SIZE):
+    """Делит файл на диапазоны байт [start, end) не меньше chunk_size,
+    границы которых совпадают с границами записей CSV: перевод строки
+    внутри кавычек границей не считается. Возвращает строку заголовка
+    и список диапазонов.
+    """
+    chunks = []
+    with open(path, 'rb') as file:
+        header = file.readline().decode('utf-8')
+        start = offset = file.tell()
+        quotes = 0
+        for line in file:
+            offset += len(line)
+            quotes += line.count(b'"')
+            if not quotes % 2 and offset - start >= chunk_size:
+                chunks.append((start, offset))
+                start = offset
+    if offset > start:
+        chunks.append((start, offset))
+    return header, chunks
+
+
+def parse_chunk(dataset, path, fieldnames, start, end):
+    """Разбирает диапазон байт файла в дочернем процессе."""
+    parse = make_row_parser(dataset)
+    with open(path, 'rb') as file:
+        file.seek(start)
+        data = file.read(end - start).decode('utf-8')
+    reader = csv.DictReader(io.StringIO(data, newline=''), fieldnames)
+    return [parse(row) for row in reader]
+
+
+def read_batches_parallel(path, dataset, batch_size, workers,
+                          chunk_size=CSV_CHUNK_SIZE):
+    """То же, что read_batches, но куски файла разбираются в пуле из
+    workers процессов. Одновременно в работе не больше
+    CSV_CHUNKS_PER_WORKER кусков на процесс, поэтому память ограничена,
+    даже если запись в базу отстаёт от разбора.
+    """
+    header, chunks = find_chunks(path, chunk_size)
+    if len(chunks) < 2:
+        yield from read_batches(path, dataset, batch_size)
+        return
+    fieldnames = next(csv.reader([header]))
+    chunks = iter(chunks)
+    batch = []
+    with ProcessPoolExecutor(workers, initializer=django.setup) as executor:
+        pending = deque(
+            executor.submit(parse_chunk, dataset, path, fieldnames, *chunk)
+            for chunk in islice(chunks, workers * CSV_CHUNKS_PER_WORKER)
+        )
+        while pending:
+            rows = pending.popleft().result()
+            chunk = next(chunks, None)
+            if chunk:
+                pending.append(executor.submit(
+                    parse_chunk, dataset, path, fieldnames, *chunk
+                ))
+            for values in rows:
+                batch.append(dataset.model(**values))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def reset_sequences(model):
+    """Сдвигает счётчики первичных ключей после вставки явных id."""
+    statements = connection.ops.sequence_reset_sql(no_style(), [model])
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def upsert_batch(dataset, batch):
+    """Сравнивает пачку с записями в базе по ключу набора данных:
+    новые строки вставляет, изменившиеся обновляет, остальные не трогает.
+    Возвращает пару (вставлено, обновлено).
+    """
+    model = dataset.model
+    key = model._meta.get_field(dataset.key).attname
+    fields = [
+        model._meta.get_field(name)
+        for name in dataset.columns.values()
+        if name not in (dataset.key, 'id')
+    ]
+    existing = model.objects.in_bulk(
+        [getattr(obj, key) for obj in batch], field_name=key
+    )
+    created = []
+    changed = []
+    for obj in batch:
+        current = existing.get(getattr(obj, key))
+        if current is None:
+            created.append(obj)
+            continue
+        diff = False
+        for field in fields:
+            value = getattr(obj, field.attname)
+            if getattr(current, field.attname) != value:
+                setattr(current, field.attname, value)
+                diff = True
+        if diff:
+            changed.append(current)
+    if created:
+        model.objects.bulk_create(created)
+    if changed:
+        # bulk_update не заполняет поля auto_now (Title.updated_at).
+        auto_now = [
+            field for field in model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+        for obj in changed:
+            for field in auto_now:
+                field.pre_save(obj, add=False)
+        model.objects.bulk_update(
+            changed, [field.attname for field in fields + auto_now]
+        )
+    return len(created), len(changed)
+
+
+def load_dataset(dataset, path=DATA_DIR, batch_size=CSV_BATCH_SIZE,
+                 upsert=False, workers=1, replace=False):
+    """Загружает CSV в таблицу в одной транзакции и возвращает тройку
+    (строк в файле, вставлено, обновлено). По умолчанию таблица очищается
+    перед загрузкой (вместе со ссылающимися на неё записями), кроме
+    наборов с truncate=False - их очищает только replace=True.
+    С upsert=True записи не удаляются, а в базу попадают только новые
+    и изменившиеся строки. При workers > 1 файл разбирается параллельно,
+    а запись остаётся в текущем процессе.
+    """
+    model = dataset.model
+    if not dataset.truncate and not replace:
+        upsert = True
+    rows = created = updated = 0
+    if workers > 1:
+        batches = read_batches_parallel(
+            path / dataset.filename, dataset, batch_size, workers
+        )
+    else:
+        batches = read_batches(path / dataset.filename, dataset, batch_size)
+    with transaction.atomic(), keep_auto_now_add(model):
+        if not upsert:
+            model.objects.all().delete()
+        for batch in batches:
+            rows += len(batch)
+            if upsert:
+                batch_created, batch_updated = upsert_batch(dataset, batch)
+            else:
+                model.objects.bulk_create(batch)
+                batch_created, batch_updated = len(batch), 0
+            created += batch_created
+            updated += batch_updated
+        if created:
+            reset_sequences(model)
+        if dataset.post_load and (not upsert or created or updated):
+            dataset.post_load()
+    return rows, created, updated
+
+
+def load_datasets(path=DATA_DIR, batch_size=CSV_BATCH_SIZE, upsert=False,
+                  workers=1, datasets=DATASETS, replace=False):
+    """Загружает наборы данных по порядку, отдавая LoadResult по каждому."""
+    for dataset in datasets:
+        start = time.monotonic()
+        rows, created, updated = load_dataset(
+            dataset, path, batch_size, upsert, workers, replace
+        )
+        yield LoadResult(
+            dataset, rows, created, updated, time.monotonic() - start
+        )
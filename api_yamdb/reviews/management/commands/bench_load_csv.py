@@ -0,0 +1,108 @@
+import csv
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.constants import CSV_BATCH_SIZE
+from reviews.importer import (DATASETS, load_dataset, read_batches,
+                              read_batches_parallel)
+
+REVIEW_TEXT = (
+    'Сгенерированный отзыв номер {}.\n'
+    'Вторая строка, "в кавычках", чтобы разбор был честным.'
+)
+AUTHORS_PER_TITLE = 1000
+
+
+def generate_reviews_csv(path, rows):
+    """Пишет review.csv из rows строк с уникальными парами автор-произведение.
+    """
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(
+            ('id', 'title_id', 'text', 'author', 'score', 'pub_date')
+        )
+        for idx in range(1, rows + 1):
+            writer.writerow((
+                idx,
+                idx % AUTHORS_PER_TITLE + 1,
+                REVIEW_TEXT.format(idx),
+                idx // AUTHORS_PER_TITLE + 1,
+                idx % 10 + 1,
+                '2019-09-24T21:08:21.567Z',
+            ))
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует review.csv заданного размера и сравнивает скорость '
+        'разбора (и, с --write, загрузки) при разном числе процессов. '
+        'Запись выполняется в транзакции, которая затем откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            nargs='+',
+            default=[1, os.cpu_count() or 1],
+            help='Варианты числа процессов для сравнения.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=CSV_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--write',
+            action='store_true',
+            help='Измерять загрузку в базу, а не только разбор.',
+        )
+
+    def handle(self, *args, **options):
+        if min(options['workers']) < 1:
+            raise CommandError('--workers должно быть не меньше 1.')
+        dataset = next(
+            dataset for dataset in DATASETS
+            if dataset.filename == 'review.csv'
+        )._replace(post_load=None)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp)
+            start = time.monotonic()
+            generate_reviews_csv(path / dataset.filename, options['rows'])
+            self.stdout.write(
+                f'Сгенерировано {options["rows"]} строк '
+                f'за {time.monotonic() - start:.1f} с'
+            )
+            for workers in options['workers']:
+                start = time.monotonic()
+                if options['write']:
+                    rows = self.write(dataset, path, options, workers)
+                else:
+                    rows = self.parse(dataset, path, options, workers)
+                seconds = time.monotonic() - start
+                self.stdout.write(
+                    f'workers={workers}: {rows} строк за {seconds:.1f} с '
+                    f'({rows / seconds:.0f} строк/с)'
+                )
+
+    def parse(self, dataset, path, options, workers):
+        file = path / dataset.filename
+        if workers > 1:
+            batches = read_batches_parallel(
+                file, dataset, options['batch_size'], workers
+            )
+        else:
+            batches = read_batches(file, dataset, options['batch_size'])
+        return sum(len(batch) for batch in batches)
+
+    def write(self, dataset, path, options, workers):
+        with transaction.atomic():
+            rows, _, _ = load_dataset(
+                dataset, path, options['batch_size'], workers=workers
+            )
+            transaction.set_rollback(True)
+        return rows
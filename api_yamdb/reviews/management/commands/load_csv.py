@@ -0,0 +1,96 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.cache import CACHED_LISTS, bump_version, is_local_cache
+from reviews.constants import CSV_BATCH_SIZE
+from reviews.importer import DATA_DIR, DATASETS, load_datasets
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает данные из CSV-файлов (static/data) в базу пачками, '
+        'по одной транзакции на файл. ВНИМАНИЕ: без --upsert таблицы '
+        'каталога (категории, жанры, произведения, отзывы, комментарии) '
+        'очищаются перед загрузкой, все их записи удаляются. Пользователи '
+        'по умолчанию добавляются и обновляются, пользователи не из CSV '
+        'сохраняются; --replace очищает и таблицу пользователей, удаляя '
+        'всех, включая администраторов. С флагом --upsert существующие '
+        'записи не удаляются: добавляются новые и обновляются изменённые. '
+        'Закэшированные списки API сбрасываются после загрузки; чтобы '
+        'сброс дошёл до запущенного сервера, кэш должен быть общим '
+        '(Redis, memcached).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            type=Path,
+            default=DATA_DIR,
+            help='Каталог с CSV-файлами.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=CSV_BATCH_SIZE,
+            help='Количество строк в одном INSERT.',
+        )
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Обновить таблицы по ключу вместо полной перезаписи.',
+        )
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help=(
+                'Удалить перед загрузкой всех пользователей, включая '
+                'администраторов, вместе с их отзывами и комментариями.'
+            ),
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Количество процессов для разбора больших файлов.',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        missing = [
+            dataset.filename for dataset in DATASETS
+            if not (path / dataset.filename).is_file()
+        ]
+        if missing:
+            raise CommandError(
+                f'В каталоге {path} не найдены файлы: {", ".join(missing)}'
+            )
+        if options['workers'] < 1:
+            raise CommandError('--workers должно быть не меньше 1.')
+        if options['upsert'] and options['replace']:
+            raise CommandError('--upsert и --replace несовместимы.')
+        if is_local_cache():
+            self.stderr.write(self.style.WARNING(
+                'Кэш API хранится в памяти процесса: сброс закэшированных '
+                'списков не дойдёт до запущенного сервера. Для загрузки '
+                'без перезапуска нужен общий кэш (Redis, memcached).'
+            ))
+        results = load_datasets(
+            path, options['batch_size'], options['upsert'],
+            options['workers'], replace=options['replace'],
+        )
+        try:
+            for result in results:
+                speed = result.rows / result.seconds if result.seconds else 0
+                self.stdout.write(
+                    f'{result.dataset.filename}: {result.rows} строк '
+                    f'за {result.seconds:.2f} с ({speed:.0f} строк/с), '
+                    f'добавлено {result.created}, обновлено {result.updated}'
+                )
+        finally:
+            # load_datasets - генератор: файлы загружаются в цикле выше.
+            # Сброс до его конца позволил бы запросам во время загрузки
+            # закэшировать старые списки под новой версией.
+            for name in CACHED_LISTS:
+                bump_version(name)
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена.'))
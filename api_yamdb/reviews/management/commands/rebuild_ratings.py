@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.cache import CATALOG, bump_version
+from reviews.rating import REBUILD_BATCH_SIZE, rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает сохранённые рейтинги произведений по отзывам. '
+        'С флагом --check только сообщает о расхождениях.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Не исправлять, а завершиться с ошибкой при расхождениях.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=REBUILD_BATCH_SIZE,
+            help='Количество произведений, обрабатываемых за один запрос.',
+        )
+
+    def handle(self, *args, **options):
+        check = options['check']
+        with transaction.atomic():
+            drifted = rebuild_ratings(
+                fix=not check, batch_size=options['batch_size']
+            )
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Расхождений не найдено.'))
+            return
+        ids = ', '.join(map(str, drifted))
+        if check:
+            raise CommandError(
+                f'Рейтинг расходится у {len(drifted)} произведений: {ids}'
+            )
+        bump_version(CATALOG)
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг пересчитан у {len(drifted)} произведений: {ids}'
+        ))
@@ -1,8 +1,17 @@
-from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 from users.models import User
 from .constants import NAME_MAX_LEN, SLUG_MAX_LEN
+from .validators import score_validators
+
+
+def calculate_rating(rating_sum, review_count):
+    """Целая часть средней оценки; None, если отзывов нет или она нулевая.
+    """
+    if not review_count:
+        return None
+    rating = rating_sum / review_count
+    return int(rating) if rating else None
 
 
 class Categories(models.Model):
@@ -51,6 +60,32 @@ class Title(models.Model):
         null=True
     )
 
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Сумма оценок',
+    )
+
+    review_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество отзывов',
+    )
+
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения',
+        help_text='Меняется и при изменении отзывов на произведение',
+    )
+
+    @property
+    def rating(self):
+        """Средняя оценка по сохранённым сумме оценок и числу отзывов."""
+        return calculate_rating(self.rating_sum, self.review_count)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['year'], name='title_year_idx'),
+        ]
+
 
 class TitleGenres(models.Model):
     title = models.ForeignKey(Title, on_delete=models.CASCADE)
@@ -73,13 +108,18 @@ class Review(models.Model):
                             help_text='Введите текст отзыва')
     pub_date = models.DateTimeField(verbose_name='Дата публикации',
                                     auto_now_add=True)
-    score = models.IntegerField(default=0, validators=[MinValueValidator(0),
-                                MaxValueValidator(10)])
+    score = models.IntegerField(default=0, validators=score_validators)
 
     class Meta:
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx',
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
@@ -109,3 +149,9 @@ class Comment(models.Model):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['reviews', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx',
+            ),
+        ]
@@ -0,0 +1,110 @@
+from django.db import connections, router
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import Review, Title
+
+REBUILD_BATCH_SIZE = 1000
+RATING_FIELDS = ('rating_sum', 'review_count', 'updated_at')
+
+
+def change_title_rating(title_id, score_delta, count_delta=0):
+    """Атомарно сдвигает сохранённые сумму оценок и число отзывов
+    и обновляет отметку изменения произведения."""
+    Title.objects.filter(pk=title_id).update(
+        rating_sum=F('rating_sum') + score_delta,
+        review_count=F('review_count') + count_delta,
+        updated_at=timezone.now(),
+    )
+
+
+def touch_titles(titles):
+    """Обновляет отметку изменения произведений, чьи ответы зависят от
+    изменённых связанных объектов: категорий, жанров, авторов отзывов."""
+    titles.update(updated_at=timezone.now())
+
+
+def update_titles(titles):
+    """bulk_update полей рейтинга пачками, которые база примет целиком.
+    Django считает по два параметра на объект и поле, хотя
+    CASE WHEN pk = %s THEN %s тратит на каждое поле два и ещё один -
+    на pk в условии IN."""
+    batch_size = connections[router.db_for_write(Title)].ops.bulk_batch_size(
+        [Title._meta.pk] * (2 * len(RATING_FIELDS) + 1), titles
+    )
+    Title.objects.bulk_update(
+        titles, RATING_FIELDS, batch_size=max(batch_size, 1)
+    )
+
+
+def change_title_ratings(deltas):
+    """То же, что change_title_rating, для многих произведений сразу.
+    deltas - словарь {title_id: (score_delta, count_delta)}.
+    Все произведения обновляются одним bulk_update (пачками, если
+    база ограничивает число параметров запроса).
+    """
+    if not deltas:
+        return
+    now = timezone.now()
+    titles = []
+    for title_id, (score_delta, count_delta) in deltas.items():
+        title = Title(pk=title_id)
+        title.rating_sum = F('rating_sum') + score_delta
+        title.review_count = F('review_count') + count_delta
+        title.updated_at = now
+        titles.append(title)
+    update_titles(titles)
+
+
+def add_reviews_to_ratings(reviews):
+    """Учитывает в рейтингах новые отзывы: каждое произведение
+    обновляется один раз, а не на каждый отзыв."""
+    deltas = {}
+    for review in reviews:
+        total, count = deltas.get(review.title_id, (0, 0))
+        deltas[review.title_id] = (total + review.score, count + 1)
+    change_title_ratings(deltas)
+
+
+def rebuild_ratings(titles=None, fix=True, batch_size=REBUILD_BATCH_SIZE):
+    """Пересчитывает рейтинги по отзывам пачками по batch_size произведений
+    (не больше, чем база примет id в одном условии IN).
+    Возвращает список id произведений, у которых сохранённые значения
+    расходились с фактическими. При fix=False только проверяет расхождения.
+    """
+    if titles is None:
+        titles = Title.objects.all()
+    titles = titles.order_by('pk').only('pk', 'rating_sum', 'review_count')
+    limit = connections[titles.db].ops.bulk_batch_size(
+        [Title._meta.pk], [None] * batch_size
+    )
+    batch_size = max(min(batch_size, limit), 1)
+    drifted = []
+    last_pk = 0
+    while True:
+        batch = list(titles.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return drifted
+        last_pk = batch[-1].pk
+        stats = {
+            row['title']: (row['total'], row['count'])
+            for row in Review.objects.filter(
+                title__in=[title.pk for title in batch]
+            ).values('title').annotate(
+                total=Sum('score'), count=Count('pk')
+            ).order_by()
+        }
+        changed = []
+        now = timezone.now()
+        for title in batch:
+            rating_sum, review_count = stats.get(title.pk, (0, 0))
+            if (title.rating_sum, title.review_count) != (
+                rating_sum, review_count
+            ):
+                drifted.append(title.pk)
+                title.rating_sum = rating_sum
+                title.review_count = review_count
+                title.updated_at = now
+                changed.append(title)
+        if fix and changed:
+            update_titles(changed)
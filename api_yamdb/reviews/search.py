@@ -0,0 +1,153 @@
+"""Полнотекстовый поиск по названию и описанию произведений.
+
+SQLite: таблица FTS5 с внешним содержимым reviews_title, которую
+синхронизируют триггеры на вставку, изменение и удаление.
+PostgreSQL: GIN-индекс по выражению to_tsvector.
+На остальных базах поиск сводится к icontains.
+"""
+import re
+
+from django.db import OperationalError, connections
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'reviews_title_fts'
+TOKEN_RE = re.compile(r'\w+')
+
+SQLITE_TRIGGERS = {
+    'reviews_title_fts_ai': (
+        'AFTER INSERT ON reviews_title BEGIN '
+        f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+        'VALUES (new.id, new.name, new.description); END'
+    ),
+    'reviews_title_fts_ad': (
+        'AFTER DELETE ON reviews_title BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) '
+        "VALUES ('delete', old.id, old.name, old.description); END"
+    ),
+    'reviews_title_fts_au': (
+        'AFTER UPDATE OF name, description ON reviews_title BEGIN '
+        f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) '
+        "VALUES ('delete', old.id, old.name, old.description); "
+        f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+        'VALUES (new.id, new.name, new.description); END'
+    ),
+}
+SQLITE_TABLE = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "name, description, content='reviews_title', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')"
+)
+# Вес совпадения в названии выше, чем в описании. bm25 считается в том
+# же запросе, что и MATCH: таблица FTS5 присоединяется к reviews_title,
+# и поиск по индексу выполняется один раз, а не на каждое произведение.
+SQLITE_RANK = f'bm25({FTS_TABLE}, 10.0, 1.0)'
+SQLITE_JOIN = f'"{FTS_TABLE}"."rowid" = "reviews_title"."id"'
+SQLITE_MATCH = f'"{FTS_TABLE}" MATCH %s'
+
+PG_INDEX = 'title_search_idx'
+PG_VECTOR = (
+    "to_tsvector('simple', coalesce({table}name, '') || ' ' "
+    "|| coalesce({table}description, ''))"
+)
+PG_QUERY_VECTOR = PG_VECTOR.format(table='"reviews_title".')
+
+# Базы SQLite (по имени файла), в которых есть таблица FTS5.
+_fts_databases = set()
+
+
+def fts_available(connection):
+    name = connection.settings_dict['NAME']
+    if name not in _fts_databases:
+        if FTS_TABLE not in connection.introspection.table_names():
+            return False
+        _fts_databases.add(name)
+    return True
+
+
+def sqlite_triggers_installed(connection):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+            'AND name IN (%s, %s, %s)', list(SQLITE_TRIGGERS)
+        )
+        return len(cursor.fetchall()) == len(SQLITE_TRIGGERS)
+
+
+def install(connection):
+    """Создаёт поисковый индекс и заполняет его текущими данными.
+    Повторный вызов безопасен.
+    """
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            try:
+                cursor.execute(SQLITE_TABLE)
+            except OperationalError:
+                # SQLite собран без FTS5: поиск работает через icontains.
+                return
+            for name, body in SQLITE_TRIGGERS.items():
+                cursor.execute(f'CREATE TRIGGER IF NOT EXISTS {name} {body}')
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON reviews_title '
+                f'USING GIN ({PG_VECTOR.format(table="")})'
+            )
+
+
+def uninstall(connection):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            for name in SQLITE_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+
+
+def ensure_index(using='default', **kwargs):
+    """Обработчик post_migrate. SQLite пересоздаёт таблицу при изменении
+    её схемы и теряет при этом триггеры - восстанавливаем их и индекс.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    if not fts_available(connection):
+        return
+    if not sqlite_triggers_installed(connection):
+        install(connection)
+
+
+def search_titles(queryset, text):
+    """Фильтрует произведения по словам из text (каждое - как префикс)
+    и сортирует по релевантности."""
+    tokens = TOKEN_RE.findall(text)
+    if not tokens:
+        return queryset
+    connection = connections[queryset.db]
+    vendor = connection.vendor
+    if vendor == 'sqlite' and fts_available(connection):
+        query = ' '.join(f'"{token}"*' for token in tokens)
+        return queryset.extra(
+            select={'search_rank': SQLITE_RANK},
+            tables=[FTS_TABLE],
+            where=[SQLITE_JOIN, SQLITE_MATCH],
+            params=[query],
+        ).order_by('search_rank', 'id')
+    if vendor == 'postgresql':
+        query = ' & '.join(f'{token}:*' for token in tokens)
+        return queryset.filter(RawSQL(
+            f"{PG_QUERY_VECTOR} @@ to_tsquery('simple', %s)",
+            (query,), BooleanField(),
+        )).annotate(search_rank=RawSQL(
+            f"ts_rank({PG_QUERY_VECTOR}, to_tsquery('simple', %s))",
+            (query,), FloatField(),
+        )).order_by('-search_rank', 'id')
+    condition = Q()
+    for token in tokens:
+        condition &= (
+            Q(name__icontains=token) | Q(description__icontains=token)
+        )
+    return queryset.filter(condition)
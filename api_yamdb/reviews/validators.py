@@ -0,0 +1,19 @@
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
+
+from .constants import MAX_SCORE, MIN_SCORE
+
+score_validators = [
+    MinValueValidator(MIN_SCORE),
+    MaxValueValidator(MAX_SCORE),
+]
+
+
+def is_valid_score(value):
+    """Проходит ли оценка валидаторы поля Review.score."""
+    try:
+        for validator in score_validators:
+            validator(value)
+    except ValidationError:
+        return False
+    return True
@@ -10,7 +10,11 @@
 4) python manage.py check - найдите ошибки и, при необходимости, исправьте их;
 
 5) python manage.py runscript load_titles - eсли все пойдет хорошо, вы увидите
-импортированные строки, напечатанные в консоли;
+количество импортированных строк по каждому файлу. То же самое делает
+команда python manage.py load_csv, которая дополнительно принимает
+--path, --batch-size, --upsert, --replace и --workers. Загрузка
+перезаписывает таблицы каталога; пользователи, которых нет в CSV,
+сохраняются;
 
 6) python manage.py runserver
 
@@ -20,66 +24,10 @@
 """
 
 
-import csv
-
-from reviews.models import Categories, Genres, Title, TitleGenres
+from reviews.importer import load_datasets
 
 
 def run():
-    with open('static/data/category.csv') as file:
-        reader = csv.reader(file)
-        next(reader)
-
-        Categories.objects.all().delete()
-
-        for row in reader:
-            print(row)
-
-            category = Categories(id=row[0],
-                                  name=row[1],
-                                  slug=row[2],
-                                  )
-            category.save()
-
-    with open('static/data/genre.csv') as file:
-        reader = csv.reader(file)
-        next(reader)
-
-        Genres.objects.all().delete()
-
-        for row in reader:
-            print(row)
-
-            genre = Genres(id=row[0],
-                           name=row[1],
-                           slug=row[2],)
-            genre.save()
-
-    with open('static/data/titles.csv') as file:
-        reader = csv.reader(file)
-        next(reader)
-
-        Title.objects.all().delete()
-
-        for row in reader:
-            print(row)
-
-            title = Title(id=row[0],
-                          name=row[1],
-                          year=row[2],)
-            title.save()
-
-    with open('static/data/genre_title.csv') as file:
-        """id,title_id,genre_id"""
-        reader = csv.reader(file)
-        next(reader)
-
-        TitleGenres.objects.all().delete()
-
-        for row in reader:
-            print(row)
-
-            title_genres = TitleGenres(id=row[0],
-                                       title_id=row[1],
-                                       genre_id=row[2],)
-            title_genres.save()
+    for result in load_datasets():
+        print(f'{result.dataset.filename}: {result.rows} строк '
+              f'за {result.seconds:.2f} с')
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .constants import (ADMIN, MODERATOR, TOKEN_VERSION_CACHE_KEY,
+                        TOKEN_VERSION_CACHE_TIMEOUT, USER)
+from .models import User
+
+# Претензии, которые get_token_for_user кладёт в токен.
+TOKEN_CLAIMS = ('username', 'role', 'is_superuser', 'token_version')
+# Отметка в кэше для удалённых и неактивных пользователей.
+NO_USER = -1
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, собранный из претензий токена без запроса к базе.
+    Поддерживает те же проверки ролей, что и модель User."""
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_user(self):
+        return self.role == USER
+
+    @property
+    def is_moderator(self):
+        return self.role == MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.role == ADMIN or self.is_superuser
+
+
+def get_token_version(user_id):
+    """Текущая версия токенов пользователя из кэша, а при промахе - из базы.
+    Для удалённого или неактивного пользователя возвращает NO_USER."""
+    cache = caches[settings.API_CACHE_ALIAS]
+    key = TOKEN_VERSION_CACHE_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        if version is None:
+            version = NO_USER
+        cache.set(key, version, TOKEN_VERSION_CACHE_TIMEOUT)
+    return version
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Аутентификация по JWT без загрузки пользователя из базы.
+    Роль и права берутся из претензий токена; токен отзывается, если его
+    token_version не совпадает с текущей версией пользователя.
+    Токены без этих претензий обрабатываются как в JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in TOKEN_CLAIMS):
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if get_token_version(user_id) != validated_token['token_version']:
+            raise AuthenticationFailed(
+                'Токен отозван, получите новый', code='token_revoked'
+            )
+        return ClaimsUser(validated_token)
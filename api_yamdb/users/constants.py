@@ -7,3 +7,14 @@ FIRST_NAME_MAX_LEN = 150
 LAST_NAME_MAX_LEN = 150
 CONF_CODE_MAX_LEN = 150
 ROLE_MAX_LEN = 30
+TOKEN_VERSION_CACHE_KEY = 'token_version:{}'
+TOKEN_VERSION_CACHE_TIMEOUT = 300
+EMAIL_SUBJECT_MAX_LEN = 255
+EMAIL_STATUS_MAX_LEN = 10
+OUTBOX_BATCH_SIZE = 100
+CONFIRMATION_PENDING_CACHE_KEY = 'confirmation_pending:{}'
+CONFIRMATION_CODE_CACHE_KEY = 'confirmation_code:{}'
+CONFIRMATION_ATTEMPTS_CACHE_KEY = 'confirmation_attempts:{}'
+CONFIRMATION_CODE_BYTES = 16
+TOKEN_STATE_CACHE_KEY = 'refresh_token:{}'
+JTI_MAX_LEN = 255
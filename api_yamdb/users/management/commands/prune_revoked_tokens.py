@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from users.registration.blacklist import prune
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из базы записи об отозванных refresh-токенах, срок '
+        'действия которых истёк. Запускается периодически (например, cron).'
+    )
+
+    def handle(self, *args, **options):
+        deleted = prune()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено записей об истёкших токенах: {deleted}'
+        ))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.constants import OUTBOX_BATCH_SIZE
+from users.registration.outbox import MailDispatcher
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет письма из очереди OutgoingEmail пачками через одно '
+        'соединение с почтовым сервером. Без --once работает постоянно, '
+        'проверяя очередь раз в --interval секунд.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Отправить готовые письма и завершиться.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между проверками очереди, с.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=OUTBOX_BATCH_SIZE,
+            help='Количество писем в одной пачке.',
+        )
+
+    def handle(self, *args, **options):
+        with MailDispatcher(options['batch_size']) as dispatcher:
+            while True:
+                if dispatcher.dispatch():
+                    self.write_stats(dispatcher)
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+
+    def write_stats(self, dispatcher):
+        stats = dispatcher.get_stats()
+        self.stdout.write(
+            f'Отправлено {stats["sent"]} писем в {stats["batches"]} пачках '
+            f'за {stats["seconds"]:.2f} с ({stats["throughput"]:.0f} '
+            f'писем/с), не отправлено {stats["failed"]}'
+        )
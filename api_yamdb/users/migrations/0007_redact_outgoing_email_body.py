@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+def redact_bodies(apps, schema_editor):
+    """Стирает коды подтверждения из уже обработанных писем."""
+    OutgoingEmail = apps.get_model('users', 'OutgoingEmail')
+    OutgoingEmail.objects.filter(
+        status__in=('sent', 'failed')
+    ).exclude(body='').update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0006_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(redact_bodies, migrations.RunPython.noop),
+    ]
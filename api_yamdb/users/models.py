@@ -1,12 +1,88 @@
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import UserManager as AuthUserManager
+from django.core.cache import caches
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 
-from .constants import (ADMIN, EMAIL_MAX_LEN, FIRST_NAME_MAX_LEN,
-                        LAST_NAME_MAX_LEN, MODERATOR, ROLE_MAX_LEN, USER,
+from .constants import (ADMIN, CONFIRMATION_CODE_CACHE_KEY, EMAIL_MAX_LEN,
+                        EMAIL_STATUS_MAX_LEN, EMAIL_SUBJECT_MAX_LEN,
+                        FIRST_NAME_MAX_LEN, JTI_MAX_LEN, LAST_NAME_MAX_LEN,
+                        MODERATOR, ROLE_MAX_LEN, TOKEN_VERSION_CACHE_KEY, USER,
                         USERNAME_MAX_LEN)
 from .validators import username_not_me_validator, username_validator
 
 
+# Поля, изменение которых отзывает выданные токены.
+TOKEN_CLAIM_FIELDS = ('role', 'is_superuser', 'is_active', 'username')
+
+
+def forget_token_versions(users):
+    """Сбрасывает закэшированные версии токенов и выданные коды
+    подтверждения (они хранят прежние права) после коммита.
+    users - пары (id, имя пользователя)."""
+    if not users:
+        return
+    versions = [TOKEN_VERSION_CACHE_KEY.format(pk) for pk, _ in users]
+    codes = [
+        CONFIRMATION_CODE_CACHE_KEY.format(username) for _, username in users
+    ]
+    api_cache = caches[settings.API_CACHE_ALIAS]
+    state_cache = caches[settings.STATE_CACHE_ALIAS]
+
+    def forget():
+        api_cache.delete_many(versions)
+        state_cache.delete_many(codes)
+
+    transaction.on_commit(forget)
+
+
+class UserQuerySet(models.QuerySet):
+    """update() и bulk_update() отзывают токены так же, как User.save():
+    при изменении полей TOKEN_CLAIM_FIELDS увеличивают token_version."""
+
+    def update(self, **kwargs):
+        if ('token_version' in kwargs
+                or not set(TOKEN_CLAIM_FIELDS) & kwargs.keys()):
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            users = list(self.values_list('pk', 'username'))
+            rows = super().update(
+                token_version=F('token_version') + 1, **kwargs
+            )
+        if 'username' in kwargs:
+            users += [(pk, kwargs['username']) for pk, _ in users]
+        forget_token_versions(users)
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        if ('token_version' in fields
+                or not set(TOKEN_CLAIM_FIELDS) & set(fields)):
+            return super().bulk_update(objs, fields, batch_size)
+        objs = list(objs)
+        changed = [obj for obj in objs if obj.token_claims_changed(True)]
+        versions = [obj.token_version for obj in changed]
+        for obj in changed:
+            obj.token_version = F('token_version') + 1
+        try:
+            rows = super().bulk_update(
+                objs, [*fields, 'token_version'], batch_size
+            )
+        finally:
+            for obj, version in zip(changed, versions):
+                obj.token_version = version
+        for obj in changed:
+            obj.token_version += 1
+            obj.forget_token_version()
+            obj._token_claims = obj.get_token_claims()
+        return rows
+
+
+class UserManager(AuthUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     """Модель Пользователя."""
 
@@ -67,6 +143,16 @@ class User(AbstractUser):
         help_text='Выберите роль пользователя',
     )
 
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+        help_text='Увеличивается при смене прав; старые токены отзываются',
+    )
+
+    TOKEN_CLAIM_FIELDS = TOKEN_CLAIM_FIELDS
+
+    objects = UserManager()
+
     @property
     def is_user(self):
         return self.role == USER
@@ -86,3 +172,136 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_claims = instance.get_token_claims()
+        return instance
+
+    def get_token_claims(self):
+        return tuple(
+            self.__dict__.get(field) for field in self.TOKEN_CLAIM_FIELDS
+        )
+
+    def token_claims_changed(self, default=False):
+        """Изменились ли поля TOKEN_CLAIM_FIELDS с загрузки из базы.
+        Для объекта, не загруженного из базы, возвращает default."""
+        if not hasattr(self, '_token_claims'):
+            return default
+        return self._token_claims != self.get_token_claims()
+
+    def save(self, *args, **kwargs):
+        claims = self.get_token_claims()
+        changed = self.token_claims_changed()
+        if changed:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_claims = claims
+        if changed:
+            self.forget_token_version()
+
+    def delete(self, *args, **kwargs):
+        self.forget_token_version()
+        return super().delete(*args, **kwargs)
+
+    def forget_token_version(self):
+        forget_token_versions([(self.pk, self.username)])
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку.
+    Запрос только сохраняет письмо, отправляет его фоновый обработчик
+    (см. users.registration.outbox). Текст хранится, пока письмо ждёт
+    отправки: в нём код подтверждения.
+    """
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=EMAIL_SUBJECT_MAX_LEN,
+    )
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(
+        verbose_name='Отправитель',
+        max_length=EMAIL_MAX_LEN,
+    )
+    recipient = models.EmailField(
+        verbose_name='Получатель',
+        max_length=EMAIL_MAX_LEN,
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        choices=STATUS_CHOICES,
+        max_length=EMAIL_STATUS_MAX_LEN,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки',
+        default=0,
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now,
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Создано',
+        auto_now_add=True,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name='Отправлено',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('id',)
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at'],
+                name='outbox_status_next_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.recipient}'
+
+
+class RevokedToken(models.Model):
+    """Отозванный refresh-токен. Запись создаётся при отзыве
+    (users.registration.blacklist) и удаляется после истечения токена."""
+
+    jti = models.CharField(
+        verbose_name='Идентификатор токена',
+        max_length=JTI_MAX_LEN,
+        unique=True,
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Истекает',
+        db_index=True,
+    )
+
+    class Meta:
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+        ordering = ('id',)
+
+    def __str__(self):
+        return self.jti
@@ -0,0 +1,84 @@
+"""Чёрный список refresh-токенов.
+
+Таблица RevokedToken - единственный источник правды: отзыв записывается
+в неё сразу, до выдачи новой пары, а уникальный jti не даёт отозвать
+один токен дважды, в каком бы процессе ни шли параллельные обновления.
+
+Кэш API_CACHE_ALIAS хранит по одной отметке состояния на токен
+(выдан или отозван), и обычная проверка обходится без базы. Отзыв
+перезаписывает отметку; если кэш её потерял, состояние берётся
+из таблицы.
+"""
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+
+from ..constants import TOKEN_STATE_CACHE_KEY
+from ..models import RevokedToken
+
+ISSUED = 'issued'
+REVOKED = 'revoked'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def get_timeout(token):
+    """Сколько секунд токен ещё действителен."""
+    return max(int(token['exp'] - time.time()), 1)
+
+
+def set_state(token, state):
+    get_cache().set(
+        TOKEN_STATE_CACHE_KEY.format(token['jti']), state,
+        timeout=get_timeout(token),
+    )
+
+
+def register(token):
+    """Отмечает только что выданный токен как действующий."""
+    set_state(token, ISSUED)
+
+
+def is_revoked(token):
+    """Быстрая проверка по кэшу. Отметка ISSUED в кэше другого процесса
+    могла устареть, поэтому окончательно отзыв подтверждает revoke."""
+    state = get_cache().get(TOKEN_STATE_CACHE_KEY.format(token['jti']))
+    if state is None:
+        state = (
+            REVOKED if RevokedToken.objects.filter(jti=token['jti']).exists()
+            else ISSUED
+        )
+        set_state(token, state)
+    return state == REVOKED
+
+
+def revoke(token):
+    """Отзывает токен. Возвращает False, если его уже отозвал другой
+    запрос: из параллельных обновлений по одному токену проходит одно.
+    """
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(
+                jti=token['jti'],
+                expires_at=datetime.fromtimestamp(
+                    token['exp'], tz=timezone.utc
+                ),
+            )
+    except IntegrityError:
+        set_state(token, REVOKED)
+        return False
+    set_state(token, REVOKED)
+    return True
+
+
+def prune():
+    """Удаляет из базы записи об истёкших токенах."""
+    deleted, _ = RevokedToken.objects.filter(
+        expires_at__lte=datetime.now(tz=timezone.utc)
+    ).delete()
+    return deleted
@@ -1,15 +1,113 @@
+"""Коды подтверждения.
+
+Код - случайная строка, которая хранится CONFIRMATION_CODE_TIMEOUT секунд
+в виде хэша вместе с данными для JWT в кэше STATE_CACHE_ALIAS: он не
+вытесняется ответами API, которые кэшируются отдельно.
+Обмен кода на токен не обращается к базе, код одноразовый, а после
+CONFIRMATION_CODE_MAX_ATTEMPTS неверных попыток для username код
+аннулируется.
+"""
+import hashlib
+import hmac
+import secrets
+
 from django.conf import settings
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
+from django.core.cache import caches
 
+from ..constants import (CONFIRMATION_ATTEMPTS_CACHE_KEY,
+                         CONFIRMATION_CODE_BYTES, CONFIRMATION_CODE_CACHE_KEY,
+                         CONFIRMATION_PENDING_CACHE_KEY)
 from ..models import User
+from .outbox import enqueue_email
+
+
+def get_cache():
+    return caches[settings.STATE_CACHE_ALIAS]
+
+
+def hash_code(confirmation_code):
+    return hashlib.sha256(confirmation_code.encode()).hexdigest()
+
+
+def issue_confirmation_code(user: User):
+    """Создаёт новый код для пользователя, заменяя предыдущий, и
+    сбрасывает счётчик неверных попыток. Возвращает код.
+    """
+    confirmation_code = secrets.token_urlsafe(CONFIRMATION_CODE_BYTES)
+    cache = get_cache()
+    cache.set(
+        CONFIRMATION_CODE_CACHE_KEY.format(user.username),
+        {
+            'hash': hash_code(confirmation_code),
+            'id': user.pk,
+            'role': user.role,
+            'is_superuser': user.is_superuser,
+            'token_version': user.token_version,
+        },
+        timeout=settings.CONFIRMATION_CODE_TIMEOUT,
+    )
+    cache.delete(CONFIRMATION_ATTEMPTS_CACHE_KEY.format(user.username))
+    return confirmation_code
+
+
+def redeem_confirmation_code(username, confirmation_code):
+    """Проверяет код и аннулирует его. Возвращает несохранённый объект
+    User с данными, нужными для выдачи токена, или None, если код неверен,
+    истёк или уже использован.
+    """
+    cache = get_cache()
+    key = CONFIRMATION_CODE_CACHE_KEY.format(username)
+    entry = cache.get(key)
+    if entry is None or not hmac.compare_digest(
+        entry['hash'], hash_code(confirmation_code)
+    ):
+        return None
+    # Из параллельных запросов с одним кодом токен получит только тот,
+    # чей delete действительно удалил ключ.
+    if not cache.delete(key):
+        return None
+    cache.delete(CONFIRMATION_PENDING_CACHE_KEY.format(entry['id']))
+    return User(
+        id=entry['id'],
+        username=username,
+        role=entry['role'],
+        is_superuser=entry['is_superuser'],
+        token_version=entry['token_version'],
+    )
+
+
+def attempts_exceeded(username):
+    attempts = get_cache().get(
+        CONFIRMATION_ATTEMPTS_CACHE_KEY.format(username), 0
+    )
+    return attempts >= settings.CONFIRMATION_CODE_MAX_ATTEMPTS
+
+
+def register_failed_attempt(user: User):
+    """Учитывает неверную попытку. Достигнув лимита, аннулирует код:
+    пользователю придётся запросить новый.
+    """
+    cache = get_cache()
+    key = CONFIRMATION_ATTEMPTS_CACHE_KEY.format(user.username)
+    cache.add(key, 0, timeout=settings.CONFIRMATION_CODE_TIMEOUT)
+    try:
+        attempts = cache.incr(key)
+    except ValueError:
+        attempts = 1
+        cache.set(key, attempts, timeout=settings.CONFIRMATION_CODE_TIMEOUT)
+    if attempts >= settings.CONFIRMATION_CODE_MAX_ATTEMPTS:
+        cache.delete_many([
+            CONFIRMATION_CODE_CACHE_KEY.format(user.username),
+            CONFIRMATION_PENDING_CACHE_KEY.format(user.pk),
+        ])
+    return attempts
 
 
 def send_confirmation_code(user: User):
-    """Посылает письмо с кодом подтверждения на эл. почту пользователя.
-    Возвращает строку с кодом подтверждения.
+    """Ставит в очередь письмо с кодом подтверждения на эл. почту
+    пользователя. Само письмо отправляет фоновый обработчик.
     """
-    confirmation_code = default_token_generator.make_token(user)
+    confirmation_code = issue_confirmation_code(user)
     email_message = (
         'Вы получили это письмо, потому что пытались зарегистрироваться \n'
         'или обновить токен на ресурсе YAMDB.\n'
@@ -17,10 +115,22 @@ def send_confirmation_code(user: User):
         'Используйте этот код подтверждения:\n'
         f'"{confirmation_code}"'
     )
-    send_mail(
-        'Регистрация',
-        email_message,
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=False,
-    )
+    enqueue_email('Регистрация', email_message, user.email)
+
+
+def request_confirmation_code(user: User):
+    """Отправляет код подтверждения, если за последние
+    SIGNUP_COALESCE_TIMEOUT секунд его ещё не отправляли.
+    Повторные запросы используют уже поставленное в очередь письмо.
+    Возвращает True, если письмо поставлено в очередь.
+    """
+    cache = get_cache()
+    key = CONFIRMATION_PENDING_CACHE_KEY.format(user.pk)
+    if not cache.add(key, True, timeout=settings.SIGNUP_COALESCE_TIMEOUT):
+        return False
+    try:
+        send_confirmation_code(user)
+    except Exception:
+        cache.delete(key)
+        raise
+    return True
@@ -0,0 +1,318 @@
+"""Очередь исходящих писем.
+
+enqueue_email() сохраняет письмо в таблицу OutgoingEmail и после коммита
+транзакции передаёт отправку обработчику, выбранному в
+EMAIL_OUTBOX_DELIVERY:
+- 'thread' - пул потоков в том же процессе, запрос не ждёт SMTP;
+- 'worker' - только сохранение, отправляет отдельный процесс
+  (команда send_outbox);
+- 'sync' - отправка сразу после коммита в том же потоке (тесты, отладка).
+Письма отправляет MailDispatcher: пачками через send_messages() по
+одному постоянному соединению с почтовым сервером.
+Неудачные письма повторяются с экспоненциальной задержкой, после
+EMAIL_OUTBOX_MAX_ATTEMPTS попыток помечаются как FAILED.
+Текст письма содержит код подтверждения, поэтому у отправленных
+и окончательно неотправленных писем он стирается.
+
+В режиме 'thread' после каждой отправки ставится таймер на ближайшую
+отложенную попытку (повтор или истёкшая аренда), так что повторы не
+ждут следующей регистрации. Письма, оставшиеся в очереди от прошлого
+запуска сервера, таймер подхватит только после первой отправки; чтобы
+не зависеть от этого, периодически запускайте send_outbox --once
+(например, cron).
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Lock, Timer, local
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..constants import OUTBOX_BATCH_SIZE
+from ..models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = Lock()
+_local = local()
+_dispatchers = []
+_timer = None
+_timer_at = None
+
+
+def enqueue_email(subject, body, recipient, from_email=None):
+    email = OutgoingEmail.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipient=recipient,
+    )
+    delivery = settings.EMAIL_OUTBOX_DELIVERY
+    if delivery == 'thread':
+        transaction.on_commit(_submit)
+    elif delivery == 'sync':
+        transaction.on_commit(deliver_pending)
+    return email
+
+
+def get_retry_delay(attempts):
+    """Задержка перед следующей попыткой: 1, 2, 4, ... базовых интервала."""
+    return timedelta(
+        seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim_batch(batch_size):
+    """Забирает письма, готовые к отправке, и откладывает их следующую
+    попытку на EMAIL_OUTBOX_LEASE секунд, чтобы параллельный обработчик
+    не отправил их повторно. Если обработчик упадёт, письма вернутся в
+    очередь по истечении этого срока.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.PENDING, next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        if emails:
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in emails]
+            ).update(next_attempt_at=now + timedelta(
+                seconds=settings.EMAIL_OUTBOX_LEASE
+            ))
+    return emails
+
+
+class MailDispatcher:
+    """Отправляет письма из очереди пачками через одно соединение с
+    почтовым сервером, которое остаётся открытым между вызовами
+    dispatch() и переоткрывается после простоя дольше
+    EMAIL_DISPATCH_IDLE_TIMEOUT секунд или после ошибки.
+
+    Доставка - «хотя бы один раз»: если пачка не ушла целиком, письма
+    досылаются по одному, и часть из них может прийти дважды.
+    """
+
+    def __init__(self, batch_size=OUTBOX_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.connection = None
+        self.last_used = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.seconds = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def throughput(self):
+        """Писем в секунду за всё время работы диспетчера."""
+        return self.sent / self.seconds if self.seconds else 0.0
+
+    def get_stats(self):
+        return {
+            'sent': self.sent,
+            'failed': self.failed,
+            'batches': self.batches,
+            'seconds': self.seconds,
+            'throughput': self.throughput,
+        }
+
+    def get_connection(self):
+        idle = time.monotonic() - self.last_used
+        if (self.connection is not None
+                and idle > settings.EMAIL_DISPATCH_IDLE_TIMEOUT):
+            self.close()
+        if self.connection is None:
+            self.connection = get_connection(fail_silently=False)
+            self.connection.open()
+        return self.connection
+
+    def close(self):
+        if self.connection is None:
+            return
+        try:
+            self.connection.close()
+        except Exception:
+            # Сервер мог уже разорвать соединение.
+            pass
+        self.connection = None
+
+    def dispatch(self):
+        """Отправляет все готовые письма. Возвращает число отправленных."""
+        total = 0
+        emails = claim_batch(self.batch_size)
+        while emails:
+            start = time.perf_counter()
+            try:
+                sent, failed = self.send_batch(emails)
+            finally:
+                self.last_used = time.monotonic()
+                self.seconds += time.perf_counter() - start
+            self.save_results(sent, failed)
+            self.batches += 1
+            self.sent += len(sent)
+            self.failed += len(failed)
+            total += len(sent)
+            emails = claim_batch(self.batch_size)
+        return total
+
+    def send_batch(self, emails):
+        """Возвращает списки отправленных и неотправленных писем."""
+        messages = [
+            EmailMessage(
+                email.subject, email.body, email.from_email,
+                [email.recipient],
+            )
+            for email in emails
+        ]
+        try:
+            self.get_connection().send_messages(messages)
+        except Exception as error:
+            logger.warning(
+                'Не удалось отправить пачку из %d писем: %s, '
+                'отправляем по одному', len(emails), error,
+            )
+            self.close()
+        else:
+            return emails, []
+        sent = []
+        failed = []
+        for email, message in zip(emails, messages):
+            try:
+                self.get_connection().send_messages([message])
+            except Exception as error:
+                logger.warning(
+                    'Не удалось отправить письмо %s на %s: %s',
+                    email.pk, email.recipient, error,
+                )
+                self.close()
+                email.last_error = str(error)
+                failed.append(email)
+            else:
+                sent.append(email)
+        return sent, failed
+
+    def save_results(self, sent, failed):
+        if sent:
+            OutgoingEmail.objects.filter(
+                pk__in=[email.pk for email in sent]
+            ).update(
+                status=OutgoingEmail.SENT, sent_at=timezone.now(),
+                last_error='', body='',
+            )
+        for email in failed:
+            email.attempts += 1
+            if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                email.status = OutgoingEmail.FAILED
+                email.body = ''
+            else:
+                email.next_attempt_at = (
+                    timezone.now() + get_retry_delay(email.attempts)
+                )
+        if failed:
+            OutgoingEmail.objects.bulk_update(
+                failed,
+                ['attempts', 'last_error', 'status', 'next_attempt_at',
+                 'body'],
+            )
+
+
+def deliver_pending(batch_size=OUTBOX_BATCH_SIZE):
+    """Разово отправляет все готовые письма. Возвращает число
+    отправленных писем.
+    """
+    with MailDispatcher(batch_size) as dispatcher:
+        return dispatcher.dispatch()
+
+
+def _deliver_in_thread():
+    # У каждого потока пула свой диспетчер: соединение с почтовым
+    # сервером переиспользуется между запусками.
+    dispatcher = getattr(_local, 'dispatcher', None)
+    if dispatcher is None:
+        dispatcher = _local.dispatcher = MailDispatcher()
+        with _executor_lock:
+            _dispatchers.append(dispatcher)
+    try:
+        dispatcher.dispatch()
+        schedule_retry()
+    except Exception:
+        logger.exception('Ошибка фоновой отправки писем')
+    finally:
+        # Поток пула живёт дольше запроса: соединение с базой закрываем
+        # сами, его не закроет обработчик request_finished.
+        connection.close()
+
+
+def schedule_retry():
+    """Ставит таймер пула на время ближайшей отложенной попытки, если
+    более ранний таймер ещё не стоит."""
+    global _timer, _timer_at
+    next_attempt_at = (
+        OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING)
+        .order_by('next_attempt_at')
+        .values_list('next_attempt_at', flat=True)
+        .first()
+    )
+    if next_attempt_at is None:
+        return
+    with _executor_lock:
+        if _executor is None:
+            # Пул уже остановлен.
+            return
+        if _timer is not None:
+            if _timer_at <= next_attempt_at:
+                return
+            _timer.cancel()
+        delay = (next_attempt_at - timezone.now()).total_seconds()
+        _timer = Timer(max(delay, 0), _on_timer)
+        _timer.daemon = True
+        _timer_at = next_attempt_at
+        _timer.start()
+
+
+def _on_timer():
+    global _timer, _timer_at
+    with _executor_lock:
+        _timer = _timer_at = None
+        if _executor is None:
+            return
+    _submit()
+
+
+def _submit():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.EMAIL_OUTBOX_THREADS,
+                thread_name_prefix='outbox',
+            )
+        _executor.submit(_deliver_in_thread)
+
+
+def shutdown_worker(wait=True):
+    """Останавливает пул потоков, дожидаясь отправки поставленных писем,
+    и закрывает соединения потоков с почтовым сервером."""
+    global _executor, _dispatchers, _timer, _timer_at
+    with _executor_lock:
+        executor, _executor = _executor, None
+        dispatchers, _dispatchers = _dispatchers, []
+        if _timer is not None:
+            _timer.cancel()
+        _timer = _timer_at = None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+    for dispatcher in dispatchers:
+        dispatcher.close()
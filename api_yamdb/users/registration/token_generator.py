@@ -1,8 +1,43 @@
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from ..authentication import get_token_version
+from . import blacklist
+
 
 def get_token_for_user(user):
-    """Возвращает словарь вида {token: access_token}."""
+    """Возвращает словарь вида {token: access_token, refresh: refresh_token}.
+    Токен содержит роль и версию токенов пользователя, поэтому
+    StatelessJWTAuthentication не обращается к базе за пользователем.
+    """
     refresh = RefreshToken.for_user(user)
+    refresh['username'] = user.username
+    refresh['role'] = user.role
+    refresh['is_superuser'] = user.is_superuser
+    refresh['token_version'] = user.token_version
+    blacklist.register(refresh)
+
+    return {'token': str(refresh.access_token), 'refresh': str(refresh)}
+
+
+def refresh_token_pair(raw_refresh):
+    """Обменивает refresh-токен на новую пару токенов с теми же
+    претензиями. Старый refresh-токен отзывается. Если с момента выдачи
+    у пользователя сменились права, требуется новый код подтверждения.
+    Ошибки сообщаются исключением TokenError.
+    """
+    refresh = RefreshToken(raw_refresh)
+    if blacklist.is_revoked(refresh):
+        raise TokenError('Токен отозван')
+    user_id = refresh[api_settings.USER_ID_CLAIM]
+    if get_token_version(user_id) != refresh.get('token_version'):
+        raise TokenError('Токен отозван, получите новый код подтверждения')
+    if not blacklist.revoke(refresh):
+        raise TokenError('Токен отозван')
+    refresh.set_jti()
+    refresh.set_exp()
+    refresh.set_iat()
+    blacklist.register(refresh)
 
-    return {'token': str(refresh.access_token)}
+    return {'token': str(refresh.access_token), 'refresh': str(refresh)}
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def sync_outbox(settings):
+    """Письма отправляются сразу после коммита, чтобы тесты могли
+    проверять mail.outbox без ожидания фонового потока."""
+    settings.EMAIL_OUTBOX_DELIVERY = 'sync'
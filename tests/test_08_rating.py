@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_reviews, create_titles, record_query_params
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAPI:
+
+    def test_01_rating_follows_review_changes(self, admin_client, admin,
+                                              user, user_client):
+        from reviews.models import Title
+
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        reviews_url = f'{title_url}reviews/'
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.review_count) == (10, 2), (
+            'Проверьте, что при создании отзыва обновляются сохранённые '
+            'сумма оценок и количество отзывов произведения.'
+        )
+
+        response = user_client.patch(
+            f'{reviews_url}{reviews[1]["id"]}/', data={'score': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert admin_client.get(title_url).json()['rating'] == 7, (
+            'Проверьте, что при изменении оценки отзыва пересчитывается '
+            'рейтинг произведения.'
+        )
+
+        response = admin_client.delete(f'{reviews_url}{reviews[0]["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert admin_client.get(title_url).json()['rating'] == 10, (
+            'Проверьте, что при удалении отзыва пересчитывается '
+            'рейтинг произведения.'
+        )
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert admin_client.get(title_url).json()['rating'] is None, (
+            'Проверьте, что при удалении автора отзывов пересчитывается '
+            'рейтинг произведения.'
+        )
+
+    def test_02_title_list_has_no_aggregate_queries(self, admin_client,
+                                                    admin, client):
+        create_reviews(admin_client, {admin: admin_client})
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            'AVG(' in query['sql'] for query in context.captured_queries
+        ), (
+            'Проверьте, что рейтинг в списке произведений не вычисляется '
+            'агрегирующим запросом.'
+        )
+
+    def test_03_rebuild_ratings_command(self, admin_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        Title.objects.filter(pk=titles[0]['id']).update(
+            rating_sum=7, review_count=1
+        )
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.review_count) == (0, 0), (
+            'Проверьте, что команда `rebuild_ratings` исправляет '
+            'расхождения сохранённого рейтинга.'
+        )
+        call_command('rebuild_ratings', '--check')
+
+    def test_04_rebuild_within_query_params(self):
+        from reviews.models import Title
+        from reviews.rating import rebuild_ratings
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number}', year=2000, rating_sum=5,
+                  review_count=1)
+            for number in range(1200)
+        )
+        with record_query_params() as params:
+            drifted = rebuild_ratings()
+        assert len(drifted) == 1200
+        assert not Title.objects.exclude(review_count=0).exists()
+        limit = connection.features.max_query_params
+        if limit:
+            assert max(params) <= limit, (
+                'Проверьте, что пересчёт рейтингов не превышает число '
+                'параметров запроса, которое допускает база.'
+            )
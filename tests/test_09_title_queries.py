@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.fixture
+def titles_catalog():
+    from reviews.models import Categories, Genres, Title, TitleGenres
+
+    def create(count):
+        category = Categories.objects.create(name='Фильм', slug='films')
+        genres = [
+            Genres.objects.create(name='Ужасы', slug='horror'),
+            Genres.objects.create(name='Комедия', slug='comedy'),
+        ]
+        Title.objects.bulk_create([
+            Title(name=f'Произведение {idx}', year=2000, category=category,
+                  rating_sum=idx % 10, review_count=1)
+            for idx in range(count)
+        ])
+        TitleGenres.objects.bulk_create([
+            TitleGenres(title=title, genre=genre)
+            for title in Title.objects.all() for genre in genres
+        ])
+
+    return create
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    @pytest.mark.parametrize('page_size', (5, 100, 1000))
+    def test_01_title_list_query_count(self, client, titles_catalog,
+                                       django_assert_num_queries, page_size):
+        titles_catalog(page_size)
+        # COUNT для пагинации, произведения с категорией, жанры.
+        with django_assert_num_queries(3):
+            response = client.get(f'/api/v1/titles/?limit={page_size}')
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert len(results) == page_size
+        assert all(
+            len(title['genre']) == 2 and title['category']['slug'] == 'films'
+            for title in results
+        ), (
+            'Проверьте, что ответ на GET-запрос к `/api/v1/titles/` '
+            'содержит жанры и категорию каждого произведения.'
+        )
+
+    def test_02_title_detail_query_count(self, client, titles_catalog,
+                                         django_assert_num_queries):
+        from reviews.models import Title
+
+        titles_catalog(5)
+        title = Title.objects.first()
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/v1/titles/{title.pk}/')
+        assert response.status_code == HTTPStatus.OK
+        assert len(response.json()['genre']) == 2
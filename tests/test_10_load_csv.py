@@ -0,0 +1,152 @@
+import csv
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10LoadCsv:
+
+    def test_01_load_all_datasets(self):
+        from reviews.importer import DATA_DIR, DATASETS
+        from reviews.models import Review, Title
+
+        out = StringIO()
+        call_command('load_csv', '--batch-size', '10', stdout=out)
+        call_command('load_csv', stdout=out)
+        for dataset in DATASETS:
+            with open(DATA_DIR / dataset.filename, encoding='utf-8') as file:
+                expected = sum(1 for _ in csv.DictReader(file))
+            assert dataset.model.objects.count() == expected, (
+                f'Проверьте, что команда `load_csv` загружает все строки '
+                f'файла `{dataset.filename}`.'
+            )
+            assert f'{dataset.filename}: {expected} строк' in out.getvalue()
+
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.isoformat().startswith('2019-09-24T21:08:21'), (
+            'Проверьте, что при загрузке отзывов сохраняется дата из CSV.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        assert title.review_count == title.reviews.count(), (
+            'Проверьте, что после загрузки отзывов пересчитываются '
+            'рейтинги произведений.'
+        )
+        assert title.category_id is not None
+
+    def test_02_upsert_touches_only_delta(self, tmp_path, django_user_model):
+        import shutil
+
+        from reviews.importer import DATA_DIR, DATASETS
+        from reviews.models import Genres, Review, Title
+
+        for dataset in DATASETS:
+            shutil.copy(DATA_DIR / dataset.filename, tmp_path)
+        call_command('load_csv', '--path', str(tmp_path), stdout=StringIO())
+        reviews_count = Review.objects.count()
+        user = django_user_model.objects.create_user(
+            username='NotInCsv', email='notincsv@yamdb.fake'
+        )
+
+        titles_file = tmp_path / 'titles.csv'
+        titles_file.write_text(
+            titles_file.read_text(encoding='utf-8').replace(
+                'Побег из Шоушенка', 'Побег из Шоушенка (1994)'
+            ),
+            encoding='utf-8',
+        )
+        with open(tmp_path / 'genre.csv', 'a', encoding='utf-8') as file:
+            file.write('\n100,Нуар,noir\n')
+
+        out = StringIO()
+        call_command(
+            'load_csv', '--path', str(tmp_path), '--upsert', stdout=out
+        )
+        output = out.getvalue()
+        assert 'titles.csv: 32 строк' in output
+        assert 'добавлено 0, обновлено 1' in output, (
+            'Проверьте, что в режиме `--upsert` обновляются только '
+            'изменившиеся строки.'
+        )
+        assert 'добавлено 1, обновлено 0' in output, (
+            'Проверьте, что в режиме `--upsert` добавляются новые строки.'
+        )
+        assert Title.objects.get(pk=1).name == 'Побег из Шоушенка (1994)'
+        assert Genres.objects.filter(slug='noir').exists()
+        assert Review.objects.count() == reviews_count, (
+            'Проверьте, что режим `--upsert` не удаляет связанные записи.'
+        )
+        assert django_user_model.objects.filter(pk=user.pk).exists(), (
+            'Проверьте, что режим `--upsert` не удаляет записи, '
+            'которых нет в CSV.'
+        )
+
+    def test_03_parallel_parsing_matches_sequential(self, tmp_path):
+        from reviews.importer import (DATASETS, find_chunks, read_batches,
+                                      read_batches_parallel)
+        from reviews.management.commands.bench_load_csv import (
+            generate_reviews_csv)
+
+        dataset = next(
+            dataset for dataset in DATASETS
+            if dataset.filename == 'review.csv'
+        )
+        path = tmp_path / dataset.filename
+        generate_reviews_csv(path, 500)
+        _, chunks = find_chunks(path, chunk_size=1000)
+        assert len(chunks) > 2
+
+        def rows(batches):
+            return [
+                (obj.id, obj.title_id, obj.author_id, obj.text, obj.score)
+                for batch in batches for obj in batch
+            ]
+
+        assert rows(read_batches_parallel(
+            path, dataset, batch_size=64, workers=2, chunk_size=1000
+        )) == rows(read_batches(path, dataset, batch_size=64)), (
+            'Проверьте, что параллельный разбор CSV по кускам даёт те же '
+            'строки, что и последовательный, включая многострочные поля.'
+        )
+
+    def test_04_load_with_workers(self):
+        from reviews.models import Review
+
+        call_command('load_csv', '--workers', '2', stdout=StringIO())
+        assert Review.objects.count() == 72
+
+    def test_05_cache_bumped_after_load(self, monkeypatch):
+        from reviews.management.commands import load_csv
+        from reviews.models import Review
+
+        reviews_at_bump = []
+        monkeypatch.setattr(
+            load_csv, 'bump_version',
+            lambda name: reviews_at_bump.append(Review.objects.count()),
+        )
+        call_command('load_csv', stdout=StringIO(), stderr=StringIO())
+        assert reviews_at_bump and set(reviews_at_bump) == {72}, (
+            'Проверьте, что `load_csv` сбрасывает закэшированные списки '
+            'после загрузки всех файлов, а не до неё.'
+        )
+
+    def test_06_users_kept_without_replace(self, admin):
+        from django.core.management.base import CommandError
+
+        from users.models import User
+
+        call_command('load_csv', stdout=StringIO(), stderr=StringIO())
+        assert User.objects.filter(pk=admin.pk).exists(), (
+            'Проверьте, что `load_csv` без `--replace` не удаляет '
+            'пользователей, которых нет в CSV.'
+        )
+        with pytest.raises(CommandError):
+            call_command('load_csv', '--upsert', '--replace')
+        call_command(
+            'load_csv', '--replace', stdout=StringIO(), stderr=StringIO()
+        )
+        assert not User.objects.filter(pk=admin.pk).exists(), (
+            'Проверьте, что `load_csv --replace` перезаписывает таблицу '
+            'пользователей.'
+        )
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ListCache:
+
+    @pytest.mark.parametrize('url, create', (
+        ('/api/v1/categories/', create_categories),
+        ('/api/v1/genres/', create_genre),
+    ))
+    def test_01_list_is_cached(self, admin_client, client, url, create,
+                               django_assert_num_queries):
+        objects = create(admin_client)
+        response = client.get(f'{url}?limit=1&offset=1')
+        assert response.status_code == HTTPStatus.OK
+        etag = response['ETag']
+        with django_assert_num_queries(0):
+            cached = client.get(f'{url}?offset=1&limit=1')
+        assert cached.json() == response.json(), (
+            f'Проверьте, что закэшированный ответ `{url}` совпадает '
+            'с исходным, включая параметры пагинации.'
+        )
+        assert cached.json()['count'] == len(objects)
+        assert cached['ETag'] == etag
+
+        with django_assert_num_queries(0):
+            response = client.get(
+                f'{url}?limit=1&offset=1', HTTP_IF_NONE_MATCH=etag
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает ответ со статусом 304.'
+        )
+
+        search = client.get(f'{url}?search={objects[0]["name"]}')
+        assert search.json()['results'] == [objects[0]]
+
+    @pytest.mark.parametrize('url, create', (
+        ('/api/v1/categories/', create_categories),
+        ('/api/v1/genres/', create_genre),
+    ))
+    def test_02_cache_invalidated_on_write(self, admin_client, client, url,
+                                           create):
+        objects = create(admin_client)
+        response = client.get(url)
+        etag = response['ETag']
+
+        data = {'name': 'Новое', 'slug': 'new'}
+        admin_client.post(url, data=data)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после создания объекта кэш `{url}` '
+            'сбрасывается.'
+        )
+        assert response.json()['count'] == len(objects) + 1
+        etag = response['ETag']
+
+        admin_client.delete(f'{url}{data["slug"]}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что после удаления объекта кэш `{url}` '
+            'сбрасывается.'
+        )
+        assert response.json()['count'] == len(objects)
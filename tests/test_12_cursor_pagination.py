@@ -0,0 +1,81 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.fixture
+def many_reviews(django_user_model):
+    from django.utils import timezone
+
+    from reviews.models import Comment, Review, Title
+
+    title = Title.objects.create(name='Терминатор', year=1984)
+    django_user_model.objects.bulk_create([
+        django_user_model(username=f'user{idx}', email=f'{idx}@yamdb.fake')
+        for idx in range(30)
+    ])
+    users = list(django_user_model.objects.all())
+    Review.objects.bulk_create([
+        Review(title=title, author=author, text=f'review {idx}', score=5)
+        for idx, author in enumerate(users)
+    ])
+    # Половина отзывов с одинаковой датой - проверка разрешения равенства.
+    now = timezone.now()
+    for idx, review in enumerate(Review.objects.order_by('id')):
+        review.pub_date = now - timedelta(minutes=idx // 2)
+        review.save(update_fields=('pub_date',))
+    review = Review.objects.first()
+    Comment.objects.bulk_create([
+        Comment(reviews=review, author=author, text=f'comment {idx}')
+        for idx, author in enumerate(users)
+    ])
+    return title, review
+
+
+def walk_pages(client, url):
+    pages = []
+    queries = []
+    while url:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data
+        pages.append(data['results'])
+        queries.append(len(context.captured_queries))
+        url = data['next']
+    return pages, queries
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CursorPagination:
+
+    def test_01_reviews_and_comments_cursor(self, client, many_reviews):
+        title, review = many_reviews
+        base = f'/api/v1/titles/{title.id}/reviews/'
+        for url in (base, f'{base}{review.id}/comments/'):
+            expected = client.get(f'{url}?limit=100').json()
+            assert expected['count'] == 30, (
+                f'Проверьте, что без параметра `cursor` `{url}` '
+                'использует пагинацию limit/offset.'
+            )
+            pages, queries = walk_pages(client, f'{url}?cursor=&limit=7')
+            assert [len(page) for page in pages] == [7, 7, 7, 7, 2]
+            ids = [item['id'] for page in pages for item in page]
+            assert ids == [
+                item['id'] for item in sorted(
+                    expected['results'],
+                    key=lambda item: (item['pub_date'], item['id']),
+                    reverse=True,
+                )
+            ], (
+                f'Проверьте, что курсорная пагинация `{url}` отдаёт все '
+                'объекты по одному разу в порядке (-pub_date, -id).'
+            )
+            assert len(set(queries)) == 1, (
+                'Проверьте, что глубокие страницы курсорной пагинации '
+                'требуют столько же запросов, сколько первая.'
+            )
@@ -0,0 +1,82 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(?P<table>\w+)$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+def query_plans(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    plans = []
+    with connection.cursor() as cursor:
+        for query in context.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute(f'EXPLAIN QUERY PLAN {query["sql"]}')
+            plans.append(
+                (query['sql'], [row[-1] for row in cursor.fetchall()])
+            )
+    return plans
+
+
+def assert_no_full_scans(client, url):
+    for sql, plan in query_plans(client, url):
+        for step in plan:
+            assert not FULL_SCAN.match(step) and step != TEMP_SORT, (
+                f'Запрос к `{url}` выполняет полный просмотр таблицы или '
+                f'сортировку без индекса ({step}): {sql}'
+            )
+
+
+@pytest.fixture
+def catalog(django_user_model):
+    from reviews.models import (Categories, Comment, Genres, Review, Title,
+                                TitleGenres)
+
+    author = django_user_model.objects.create_user(
+        username='author', email='author@yamdb.fake'
+    )
+    category = Categories.objects.create(name='Фильм', slug='films')
+    genre = Genres.objects.create(name='Драма', slug='drama')
+    title = Title.objects.create(
+        name='Крестный отец', year=1972, category=category
+    )
+    TitleGenres.objects.create(title=title, genre=genre)
+    review = Review.objects.create(
+        title=title, author=author, text='Шедевр', score=10
+    )
+    Comment.objects.create(reviews=review, author=author, text='Согласен')
+    return title, review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13QueryPlans:
+
+    @pytest.mark.parametrize('query', (
+        'year=1972',
+        'category=films',
+        'genre=drama',
+        'year=1972&genre=drama&category=films',
+    ))
+    def test_01_title_filters_use_indexes(self, client, catalog, query):
+        assert_no_full_scans(client, f'/api/v1/titles/?{query}')
+
+    @pytest.mark.xfail(
+        reason='LIKE с ведущим % не использует B-tree индекс', strict=True
+    )
+    def test_02_title_name_filter(self, client, catalog):
+        assert_no_full_scans(client, '/api/v1/titles/?name=отец')
+
+    def test_03_nested_lists_use_indexes(self, client, catalog):
+        title, review = catalog
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        for list_url in (url, f'{url}?cursor=',
+                         f'{url}{review.id}/comments/',
+                         f'{url}{review.id}/comments/?cursor='):
+            assert_no_full_scans(client, list_url)
@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleSearch:
+
+    def test_01_search_ranked_prefix(self, client):
+        from reviews.models import Title
+
+        Title.objects.create(
+            name='Побег из Шоушенка', year=1994,
+            description='Фильм о надежде и свободе.'
+        )
+        godfather = Title.objects.create(
+            name='Крестный отец', year=1972,
+            description='Семейная сага. Побег здесь ни при чём.'
+        )
+        Title.objects.create(name='Зеленая миля', year=1999)
+
+        response = client.get('/api/v1/titles/?search=поб')
+        assert response.status_code == HTTPStatus.OK
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Побег из Шоушенка', 'Крестный отец'], (
+            'Проверьте, что параметр `search` ищет по префиксу в названии '
+            'и описании, а совпадения в названии идут первыми.'
+        )
+
+        response = client.get('/api/v1/titles/?search=КРЕСТ отец')
+        assert [title['id'] for title in response.json()['results']] == [
+            godfather.id
+        ]
+        assert response.json()['count'] == 1
+
+    def test_02_index_follows_changes(self, client):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Терминатор', year=1984)
+        url = '/api/v1/titles/?search=терминатор'
+        assert client.get(url).json()['count'] == 1
+
+        title.name = 'Чужой'
+        title.save()
+        assert client.get(url).json()['count'] == 0, (
+            'Проверьте, что поисковый индекс обновляется при изменении '
+            'произведения.'
+        )
+        assert client.get('/api/v1/titles/?search=чуж').json()['count'] == 1
+
+        title.delete()
+        assert client.get('/api/v1/titles/?search=чуж').json()['count'] == 0
+
+    def test_03_rank_computed_once(self):
+        from django.db import connection
+
+        from api.views import TitleViewSet
+        from reviews.models import Title
+        from reviews.search import fts_available, search_titles
+
+        if connection.vendor != 'sqlite' or not fts_available(connection):
+            pytest.skip('Поиск через FTS5 доступен только в SQLite с FTS5.')
+        Title.objects.create(name='Крестный отец', year=1972)
+        queryset = search_titles(TitleViewSet.queryset, 'отец')[:5]
+        sql, params = queryset.query.sql_with_params()
+        assert sql.count('MATCH') == 1
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        assert 'CORRELATED' not in plan, (
+            'Проверьте, что релевантность считается в одном запросе '
+            'с поиском, а не коррелированным подзапросом на каждое '
+            'произведение.'
+        )
+        assert [title.name for title in queryset] == ['Крестный отец']
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15Benchmark:
+
+    def test_01_benchmark_covers_all_routes(self):
+        from api.benchmark import run_benchmark, seed
+        from api.urls import router, urlpatterns
+
+        admin = seed(
+            titles=20, users=5, reviews_per_title=3, comments_per_review=1
+        )
+        report = json.loads(json.dumps(run_benchmark(
+            admin, requests=5, warmup=1
+        )))
+        assert report['dataset'] == {
+            'titles': 20, 'users': 6, 'reviews': 60, 'comments': 60
+        }
+        measured = {route['name'] for route in report['routes']}
+        skipped = {route['name'] for route in report['skipped']}
+        expected = {pattern.name for pattern in router.urls} | {
+            pattern.name for pattern in urlpatterns
+            if getattr(pattern, 'name', None)
+        }
+        assert measured | skipped == expected, (
+            'Проверьте, что бенчмарк замеряет или явно пропускает все '
+            'маршруты из `api/urls.py`.'
+        )
+        assert {'refresh_token', 'bulk_reviews'} <= skipped
+        for route in report['skipped']:
+            if route['name'] in {'refresh_token', 'bulk_reviews'}:
+                assert route['reason'], route
+        for route in report['routes']:
+            assert route['requests'] == 5
+            assert set(route['latency_ms']) == {
+                'mean', 'p50', 'p90', 'p99', 'max'
+            }
+            assert route['queries']['max'] >= route['queries']['mean']
+            if route['method'] == 'GET':
+                assert route['status'] == {'200': 5}, route
+            else:
+                assert '429' not in route['status'], (
+                    'Проверьте, что бенчмарк отключает ограничения частоты '
+                    'запросов.'
+                )
@@ -0,0 +1,70 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def timing(settings):
+    from api.timing import reset_stats
+
+    settings.API_TIMING_ENABLED = True
+    settings.API_QUERY_BUDGET = 3
+    reset_stats()
+    yield
+    reset_stats()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16RequestTiming:
+
+    def test_01_server_timing_and_stats(self, timing, token_admin, caplog):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {token_admin["access"]}'
+        )
+        create_titles(client)
+        with caplog.at_level(logging.WARNING, logger='api.middleware'):
+            response = client.get('/api/v1/titles/')
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'serializer;dur=', 'view;dur='):
+            assert metric in header, (
+                'Проверьте, что ответ содержит заголовок `Server-Timing` '
+                f'с метрикой `{metric}`.'
+            )
+        assert '4 queries' in header
+        assert '/api/v1/titles/: 4 SQL-запросов' in caplog.text, (
+            'Проверьте, что запросы сверх бюджета попадают в лог.'
+        )
+
+        response = client.get('/api/v1/stats/')
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert data['enabled'] is True
+        routes = {
+            (route['method'], route['view']): route
+            for route in data['routes']
+        }
+        titles = routes[('GET', 'api:titles-list')]
+        assert titles['requests'] == 1
+        assert titles['queries_max'] == 4
+        assert titles['over_budget'] == 1
+        assert routes[('POST', 'api:titles-list')]['requests'] == 2
+
+        response = client.delete('/api/v1/stats/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+    def test_02_stats_admin_only(self, timing, user_client, client):
+        assert client.get('/api/v1/stats/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert user_client.get('/api/v1/stats/').status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+
+    def test_03_disabled_by_default(self, client):
+        response = client.get('/api/v1/titles/')
+        assert 'Server-Timing' not in response
@@ -0,0 +1,158 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from tests.utils import create_titles
+
+
+def stateless_client(user):
+    from users.registration.token_generator import get_token_for_user
+
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {get_token_for_user(user)["token"]}'
+    )
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17StatelessJWT:
+
+    def test_01_reads_skip_user_lookup(self, admin_client, user):
+        titles, _, _ = create_titles(admin_client)
+        client = stateless_client(user)
+        client.get('/api/v1/titles/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == HTTPStatus.OK
+        assert not any(
+            'users_user' in query['sql']
+            for query in context.captured_queries
+        ), (
+            'Проверьте, что запрос с токеном из `get_token_for_user` '
+            'не загружает пользователя из базы.'
+        )
+
+    def test_02_roles_from_claims(self, admin_client, admin, user, moderator):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client = stateless_client(user)
+        response = user_client.post(url, data={'text': 'Ок', 'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+        review_url = f'{url}{response.json()["id"]}/'
+        assert user_client.patch(
+            review_url, data={'score': 8}
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что автор может изменить свой отзыв, используя '
+            'токен без обращения к базе.'
+        )
+        assert stateless_client(admin).get(
+            '/api/v1/users/'
+        ).status_code == HTTPStatus.OK
+        assert user_client.get(
+            '/api/v1/users/'
+        ).status_code == HTTPStatus.FORBIDDEN
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новая биография'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['bio'] == 'Новая биография'
+        assert stateless_client(moderator).delete(
+            review_url
+        ).status_code == HTTPStatus.NO_CONTENT
+
+    def test_03_role_change_revokes_tokens(self, admin_client, user):
+        old_client = stateless_client(user)
+        assert old_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.OK
+        )
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert old_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что после смены роли ранее выданные токены '
+            'отзываются.'
+        )
+        user.refresh_from_db()
+        new_client = stateless_client(user)
+        assert new_client.get('/api/v1/users/').status_code == HTTPStatus.OK
+
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert new_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_04_bulk_changes_revoke_tokens(self, user, moderator):
+        from users.models import User
+
+        user_client = stateless_client(user)
+        moderator_client = stateless_client(moderator)
+        User.objects.filter(pk=user.pk).update(bio='Без смены прав')
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.OK
+        )
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что `QuerySet.update()` полей с правами '
+            'отзывает токены пользователей.'
+        )
+
+        moderator_client.get('/api/v1/users/me/')
+        moderator = User.objects.get(pk=moderator.pk)
+        moderator.role = 'user'
+        User.objects.bulk_update([moderator], ['role', 'bio'])
+        assert moderator_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что `bulk_update()` роли отзывает токены '
+            'пользователя.'
+        )
+        assert stateless_client(moderator).get(
+            '/api/v1/users/me/'
+        ).status_code == HTTPStatus.OK
+
+    def test_05_load_csv_upsert_revokes_tokens(self, tmp_path):
+        import shutil
+        from io import StringIO
+
+        from django.core.management import call_command
+
+        from reviews.importer import DATA_DIR, DATASETS
+        from users.models import User
+
+        for dataset in DATASETS:
+            shutil.copy(DATA_DIR / dataset.filename, tmp_path)
+        call_command('load_csv', '--path', str(tmp_path), stdout=StringIO())
+        admin = User.objects.get(username='capt_obvious')
+        client = stateless_client(admin)
+        other_client = stateless_client(User.objects.get(username='faust'))
+        assert client.get('/api/v1/users/').status_code == HTTPStatus.OK
+
+        users_file = tmp_path / 'users.csv'
+        users_file.write_text(
+            users_file.read_text(encoding='utf-8').replace(
+                'capt_obvious@yamdb.fake,admin', 'capt_obvious@yamdb.fake,user'
+            ),
+            encoding='utf-8',
+        )
+        call_command(
+            'load_csv', '--path', str(tmp_path), '--upsert',
+            stdout=StringIO(), stderr=StringIO(),
+        )
+        assert client.get('/api/v1/users/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что понижение роли через `load_csv --upsert` '
+            'отзывает выданные пользователю токены.'
+        )
+        assert other_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.OK
+        ), 'Проверьте, что токены остальных пользователей действуют.'
@@ -0,0 +1,176 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+SIGNUP_DATA = {'email': 'outbox@yamdb.fake', 'username': 'outbox_user'}
+
+
+class CountingBackend(EmailBackend):
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+def enqueue(count):
+    from users.registration.outbox import enqueue_email
+
+    for idx in range(count):
+        enqueue_email('Тема', f'Письмо {idx}', f'user{idx}@yamdb.fake')
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18MailOutbox:
+
+    def test_01_signup_only_enqueues(self, client, settings):
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_DELIVERY = 'worker'
+        response = client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        assert response.status_code == HTTPStatus.OK
+        assert not mail.outbox, (
+            'Проверьте, что при EMAIL_OUTBOX_DELIVERY = "worker" запрос '
+            'на регистрацию не отправляет письмо сам.'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.recipient == SIGNUP_DATA['email']
+        assert email.status == OutgoingEmail.PENDING
+
+        call_command('send_outbox', '--once')
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == [SIGNUP_DATA['email']]
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.SENT, (
+            'Проверьте, что команда `send_outbox` отправляет письма из '
+            'очереди и помечает их отправленными.'
+        )
+        assert email.body == '', (
+            'Проверьте, что у отправленного письма стирается текст '
+            'с кодом подтверждения.'
+        )
+        call_command('send_outbox', '--once')
+        assert len(mail.outbox) == 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_thread_delivery_to_files(self, client, settings, tmp_path):
+        from users.models import OutgoingEmail
+        from users.registration.outbox import shutdown_worker
+
+        settings.EMAIL_OUTBOX_DELIVERY = 'thread'
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.filebased.EmailBackend'
+        )
+        settings.EMAIL_FILE_PATH = tmp_path
+        response = client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        assert response.status_code == HTTPStatus.OK
+        shutdown_worker()
+        files = list(tmp_path.iterdir())
+        assert len(files) == 1, (
+            'Проверьте, что при EMAIL_OUTBOX_DELIVERY = "thread" письмо '
+            'отправляется фоновым потоком.'
+        )
+        assert SIGNUP_DATA['username'] in files[0].read_text()
+        assert OutgoingEmail.objects.get().status == OutgoingEmail.SENT
+
+    def test_03_one_connection_per_run(self, settings):
+        from users.registration.outbox import deliver_pending
+
+        settings.EMAIL_OUTBOX_DELIVERY = 'worker'
+        settings.EMAIL_BACKEND = 'tests.test_18_mail_outbox.CountingBackend'
+        enqueue(5)
+        CountingBackend.opened = 0
+        assert deliver_pending(batch_size=2) == 5
+        assert len(mail.outbox) == 5
+        assert CountingBackend.opened == 1, (
+            'Проверьте, что все пачки писем отправляются через одно '
+            'соединение с почтовым сервером.'
+        )
+
+    def test_04_retry_with_backoff(self, settings):
+        from users.models import OutgoingEmail
+        from users.registration.outbox import deliver_pending
+
+        settings.EMAIL_OUTBOX_DELIVERY = 'worker'
+        settings.EMAIL_OUTBOX_MAX_ATTEMPTS = 2
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 60
+        settings.EMAIL_BACKEND = 'tests.test_18_mail_outbox.FailingBackend'
+        enqueue(1)
+        assert deliver_pending() == 0
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.PENDING
+        assert email.attempts == 1
+        assert 'SMTP' in email.last_error
+        assert email.next_attempt_at > timezone.now() + timedelta(
+            seconds=50
+        ), 'Проверьте, что повторная попытка откладывается.'
+        assert deliver_pending() == 0, (
+            'Проверьте, что письмо не отправляется до наступления времени '
+            'следующей попытки.'
+        )
+
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        deliver_pending()
+        email.refresh_from_db()
+        assert email.attempts == 2
+        assert email.status == OutgoingEmail.FAILED, (
+            'Проверьте, что после EMAIL_OUTBOX_MAX_ATTEMPTS неудачных '
+            'попыток письмо помечается как неотправленное.'
+        )
+        assert email.body == ''
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        assert deliver_pending() == 0
+        assert not mail.outbox
+
+    def test_05_thread_retry_without_new_email(self, settings):
+        from users.models import OutgoingEmail
+        from users.registration.outbox import shutdown_worker
+
+        settings.EMAIL_OUTBOX_DELIVERY = 'thread'
+        settings.EMAIL_OUTBOX_RETRY_DELAY = 0.2
+        settings.EMAIL_BACKEND = 'tests.test_18_mail_outbox.FailingBackend'
+        try:
+            enqueue(1)
+            email = OutgoingEmail.objects.get()
+            wait_for(lambda: OutgoingEmail.objects.get().attempts == 1)
+            settings.EMAIL_BACKEND = (
+                'django.core.mail.backends.locmem.EmailBackend'
+            )
+            sent = wait_for(
+                lambda: OutgoingEmail.objects.get(pk=email.pk).status
+                == OutgoingEmail.SENT
+            )
+        finally:
+            shutdown_worker()
+        assert sent, (
+            'Проверьте, что при EMAIL_OUTBOX_DELIVERY = "thread" письмо '
+            'повторяется по таймеру, не дожидаясь нового письма в очереди.'
+        )
+        assert len(mail.outbox) == 1
@@ -0,0 +1,149 @@
+import socket
+from io import StringIO
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+
+from tests.test_18_mail_outbox import enqueue
+
+
+class RecordingBackend(EmailBackend):
+    opened = 0
+    batches = []
+
+    def open(self):
+        RecordingBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        RecordingBackend.batches.append(len(messages))
+        if any('bad' in message.to[0] for message in messages):
+            raise ConnectionError('Получатель отклонён')
+        return super().send_messages(messages)
+
+
+@pytest.fixture
+def recording_backend(settings):
+    settings.EMAIL_OUTBOX_DELIVERY = 'worker'
+    settings.EMAIL_BACKEND = 'tests.test_19_mail_dispatcher.RecordingBackend'
+    RecordingBackend.opened = 0
+    RecordingBackend.batches = []
+    return RecordingBackend
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19MailDispatcher:
+
+    def test_01_sends_in_batches(self, recording_backend):
+        from users.registration.outbox import MailDispatcher
+
+        enqueue(5)
+        with MailDispatcher(batch_size=2) as dispatcher:
+            assert dispatcher.dispatch() == 5
+        assert recording_backend.batches == [2, 2, 1], (
+            'Проверьте, что письма отправляются пачками по `batch_size` '
+            'через `send_messages`.'
+        )
+        assert recording_backend.opened == 1
+        assert len(mail.outbox) == 5
+        stats = dispatcher.get_stats()
+        assert stats['sent'] == 5
+        assert stats['batches'] == 3
+        assert stats['throughput'] > 0, (
+            'Проверьте, что диспетчер считает пропускную способность.'
+        )
+
+    def test_02_connection_kept_between_runs(self, recording_backend,
+                                             settings):
+        from users.registration.outbox import MailDispatcher
+
+        dispatcher = MailDispatcher()
+        enqueue(2)
+        dispatcher.dispatch()
+        enqueue(2)
+        dispatcher.dispatch()
+        assert recording_backend.opened == 1, (
+            'Проверьте, что соединение остаётся открытым между запусками '
+            'диспетчера.'
+        )
+        settings.EMAIL_DISPATCH_IDLE_TIMEOUT = 0
+        enqueue(1)
+        dispatcher.dispatch()
+        dispatcher.close()
+        assert recording_backend.opened == 2, (
+            'Проверьте, что простаивавшее соединение переоткрывается.'
+        )
+        assert len(mail.outbox) == 5
+
+    def test_03_failed_batch_sent_one_by_one(self, recording_backend):
+        from users.models import OutgoingEmail
+        from users.registration.outbox import (MailDispatcher,
+                                               enqueue_email)
+
+        enqueue(2)
+        enqueue_email('Тема', 'Письмо', 'bad@yamdb.fake')
+        with MailDispatcher() as dispatcher:
+            assert dispatcher.dispatch() == 2
+        assert sorted(
+            OutgoingEmail.objects.values_list('recipient', 'status')
+        ) == [
+            ('bad@yamdb.fake', OutgoingEmail.PENDING),
+            ('user0@yamdb.fake', OutgoingEmail.SENT),
+            ('user1@yamdb.fake', OutgoingEmail.SENT),
+        ], (
+            'Проверьте, что при ошибке пачки письма досылаются по одному и '
+            'ошибка одного письма не мешает остальным.'
+        )
+        assert dispatcher.get_stats()['failed'] == 1
+
+    def test_04_command_reports_throughput(self, recording_backend):
+        enqueue(3)
+        out = StringIO()
+        call_command('send_outbox', '--once', '--batch-size', '2',
+                     stdout=out)
+        assert 'Отправлено 3 писем в 2 пачках' in out.getvalue()
+        assert 'писем/с' in out.getvalue(), (
+            'Проверьте, что команда `send_outbox` выводит пропускную '
+            'способность.'
+        )
+
+    def test_05_smtp_server(self, settings):
+        controller_module = pytest.importorskip('aiosmtpd.controller')
+        from users.registration.outbox import MailDispatcher
+
+        class Handler:
+            def __init__(self):
+                self.sessions = set()
+                self.recipients = []
+
+            async def handle_DATA(self, server, session, envelope):
+                self.sessions.add(id(session))
+                self.recipients.extend(envelope.rcpt_tos)
+                return '250 OK'
+
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        handler = Handler()
+        controller = controller_module.Controller(
+            handler, hostname='127.0.0.1', port=port
+        )
+        controller.start()
+        try:
+            settings.EMAIL_OUTBOX_DELIVERY = 'worker'
+            settings.EMAIL_BACKEND = (
+                'django.core.mail.backends.smtp.EmailBackend'
+            )
+            settings.EMAIL_HOST = '127.0.0.1'
+            settings.EMAIL_PORT = port
+            enqueue(10)
+            with MailDispatcher(batch_size=3) as dispatcher:
+                assert dispatcher.dispatch() == 10
+        finally:
+            controller.stop()
+        assert len(handler.recipients) == 10
+        assert len(handler.sessions) == 1, (
+            'Проверьте, что все письма отправлены в одной SMTP-сессии.'
+        )
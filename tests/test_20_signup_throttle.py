@@ -0,0 +1,132 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+
+
+@pytest.fixture
+def rates(monkeypatch, settings):
+    from api.throttling import SlidingWindowThrottle
+
+    clock = {'now': 1000.0}
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'signup_ip': '4/min', 'signup_email': '2/min'
+        },
+    }
+    monkeypatch.setattr(
+        SlidingWindowThrottle, 'timer', lambda self: clock['now']
+    )
+    return clock
+
+
+def signup(client, idx, email=None, ip='10.0.0.1'):
+    return client.post(
+        SIGNUP_URL,
+        data={
+            'email': email or f'user{idx}@yamdb.fake',
+            'username': f'user{idx}',
+        },
+        REMOTE_ADDR=ip,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20SignUpThrottle:
+
+    def test_01_email_limit(self, client, rates):
+        email = 'same@yamdb.fake'
+        assert signup(client, 1, email, '10.0.0.1').status_code == 200
+        assert signup(client, 1, email, '10.0.0.2').status_code == 200
+        response = signup(client, 1, email, '10.0.0.3')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что число регистраций на один email ограничено '
+            'независимо от IP-адреса.'
+        )
+        assert int(response['Retry-After']) > 0
+        response = signup(client, 1, email.upper(), '10.0.0.4')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что email при подсчёте приводится к нижнему '
+            'регистру.'
+        )
+        assert signup(client, 2, ip='10.0.0.1').status_code == 200
+
+    def test_02_ip_limit(self, client, rates):
+        for idx in range(4):
+            assert signup(client, idx).status_code == HTTPStatus.OK
+        assert signup(client, 5).status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS
+        ), 'Проверьте, что число регистраций с одного IP ограничено.'
+        assert signup(client, 5, ip='10.0.0.2').status_code == (
+            HTTPStatus.OK
+        )
+
+    def test_03_sliding_window(self, client, rates):
+        rates['now'] = 60 * 100
+        for idx in range(4):
+            signup(client, idx)
+        rates['now'] += 60
+        assert signup(client, 4).status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS
+        ), (
+            'Проверьте, что в начале следующего интервала учитываются '
+            'запросы предыдущего.'
+        )
+        rates['now'] += 30
+        assert signup(client, 5).status_code == HTTPStatus.OK
+        assert signup(client, 6).status_code == HTTPStatus.OK
+        assert signup(client, 7).status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS
+        ), (
+            'Проверьте, что к середине интервала запросы предыдущего '
+            'учитываются с весом 1/2.'
+        )
+
+    def test_04_repeated_signup_reuses_confirmation(self, client, rates):
+        from users.models import OutgoingEmail
+
+        assert signup(client, 1).status_code == HTTPStatus.OK
+        assert signup(client, 1).status_code == HTTPStatus.OK
+        assert OutgoingEmail.objects.count() == 1, (
+            'Проверьте, что повторная регистрация в течение '
+            '`SIGNUP_COALESCE_TIMEOUT` не ставит в очередь новое письмо.'
+        )
+        assert len(mail.outbox) == 1
+
+    def test_05_confirmation_resent_after_timeout(self, client):
+        from django.conf import settings
+        from django.core.cache import caches
+
+        from users.constants import CONFIRMATION_PENDING_CACHE_KEY
+        from users.models import OutgoingEmail, User
+
+        assert signup(client, 1).status_code == HTTPStatus.OK
+        user = User.objects.get(username='user1')
+        # Истечение SIGNUP_COALESCE_TIMEOUT.
+        caches[settings.STATE_CACHE_ALIAS].delete(
+            CONFIRMATION_PENDING_CACHE_KEY.format(user.pk)
+        )
+        assert signup(client, 1).status_code == HTTPStatus.OK
+        assert OutgoingEmail.objects.count() == 2, (
+            'Проверьте, что после `SIGNUP_COALESCE_TIMEOUT` регистрация '
+            'снова отправляет письмо с кодом.'
+        )
+
+    def test_06_limit_survives_cache_traffic(self, client, rates):
+        from rest_framework.test import APIClient
+
+        email = 'flood@yamdb.fake'
+        for ip in ('10.0.0.1', '10.0.0.2'):
+            assert signup(client, 1, email, ip).status_code == HTTPStatus.OK
+            # Больше записей, чем MAX_ENTRIES кэша ответов.
+            for offset in range(400):
+                APIClient().get(f'/api/v1/titles/?offset={offset}')
+        assert signup(client, 1, email, '10.0.0.3').status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS
+        ), (
+            'Проверьте, что счётчики ограничения регистраций не '
+            'вытесняются закэшированными ответами API.'
+        )
@@ -0,0 +1,143 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import Barrier
+
+import pytest
+from django.db import OperationalError, connection
+from rest_framework.test import APIClient
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+PARALLEL_REQUESTS = 8
+
+
+@pytest.fixture
+def no_throttle(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {'signup_ip': None, 'signup_email': None},
+    }
+
+
+def parallel_signups(payloads):
+    barrier = Barrier(len(payloads))
+
+    def post(data):
+        try:
+            barrier.wait()
+            while True:
+                try:
+                    return APIClient().post(SIGNUP_URL, data=data)
+                except OperationalError as error:
+                    # Тестовая SQLite в памяти с общим кэшем не ждёт
+                    # снятия блокировки таблицы, а сразу возвращает
+                    # ошибку; повтор запроса заменяет ожидание.
+                    if 'locked' not in str(error):
+                        raise
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(payloads)) as executor:
+        return list(executor.map(post, payloads))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21SignUpValidation:
+
+    def test_01_single_query(self, django_assert_num_queries, user):
+        from api.serializers import SignUpSerializer
+
+        cases = (
+            {'username': 'new_user', 'email': 'new@yamdb.fake'},
+            {'username': user.username, 'email': user.email},
+            {'username': user.username, 'email': 'other@yamdb.fake'},
+            {'username': 'other', 'email': user.email},
+        )
+        for data in cases:
+            serializer = SignUpSerializer(data=data)
+            with django_assert_num_queries(1):
+                serializer.is_valid()
+        serializer = SignUpSerializer(
+            data={'username': user.username, 'email': user.email}
+        )
+        serializer.is_valid(raise_exception=True)
+        with django_assert_num_queries(0):
+            assert serializer.save() == user, (
+                'Проверьте, что найденный при проверке пользователь '
+                'не запрашивается из базы повторно.'
+            )
+
+    def test_02_conflict_messages(self, client, user):
+        response = client.post(SIGNUP_URL, data={
+            'username': user.username, 'email': 'other@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'username' in response.json()['non_field_errors'][0]
+        response = client.post(SIGNUP_URL, data={
+            'username': 'other', 'email': user.email
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert 'email' in response.json()['non_field_errors'][0]
+
+    def test_03_race_resolved(self, client, user, monkeypatch):
+        from api.serializers import SignUpSerializer
+
+        original = SignUpSerializer.get_conflicts
+        calls = []
+
+        def stale_conflicts(self, username, email):
+            # Первая проверка не видит пользователя, созданного
+            # параллельным запросом.
+            calls.append(username)
+            if len(calls) == 1:
+                return None, False, False
+            return original(self, username, email)
+
+        monkeypatch.setattr(SignUpSerializer, 'get_conflicts', stale_conflicts)
+        response = client.post(SIGNUP_URL, data={
+            'username': user.username, 'email': user.email
+        })
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что при гонке с созданием того же пользователя '
+            'регистрация возвращает уже созданного пользователя.'
+        )
+
+        calls.clear()
+        response = client.post(SIGNUP_URL, data={
+            'username': user.username, 'email': 'other@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что при гонке с созданием пользователя с тем же '
+            'username регистрация возвращает ошибку 400, а не 500.'
+        )
+        assert 'non_field_errors' in response.json()
+
+    def test_04_parallel_same_user(self, no_throttle):
+        from users.models import User
+
+        data = {'username': 'parallel', 'email': 'parallel@yamdb.fake'}
+        responses = parallel_signups([data] * PARALLEL_REQUESTS)
+        assert [response.status_code for response in responses] == (
+            [HTTPStatus.OK] * PARALLEL_REQUESTS
+        ), (
+            'Проверьте, что параллельные регистрации с одинаковыми данными '
+            'завершаются успешно.'
+        )
+        assert User.objects.filter(username='parallel').count() == 1
+
+    def test_05_parallel_same_username(self, no_throttle):
+        from users.models import User
+
+        responses = parallel_signups([
+            {'username': 'parallel', 'email': f'parallel{idx}@yamdb.fake'}
+            for idx in range(PARALLEL_REQUESTS)
+        ])
+        statuses = sorted(response.status_code for response in responses)
+        assert statuses == (
+            [HTTPStatus.OK] + [HTTPStatus.BAD_REQUEST] * (
+                PARALLEL_REQUESTS - 1
+            )
+        ), (
+            'Проверьте, что из параллельных регистраций с одним username '
+            'успешна только одна, а остальные получают ошибку 400.'
+        )
+        assert User.objects.filter(username='parallel').count() == 1
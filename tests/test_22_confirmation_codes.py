@@ -0,0 +1,109 @@
+import re
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from rest_framework.test import APIClient
+
+SIGNUP_URL = '/api/v1/auth/signup/'
+TOKEN_URL = '/api/v1/auth/token/'
+SIGNUP_DATA = {'email': 'code@yamdb.fake', 'username': 'code_user'}
+
+
+def get_code():
+    return re.search(r'"(.+)"', mail.outbox[-1].body).group(1)
+
+
+def obtain(client, code, username=SIGNUP_DATA['username']):
+    return client.post(
+        TOKEN_URL, data={'username': username, 'confirmation_code': code}
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22ConfirmationCodes:
+
+    def test_01_code_exchange_without_db(self, client,
+                                         django_assert_num_queries):
+        client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        code = get_code()
+        with django_assert_num_queries(0):
+            response = obtain(client, code)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что код из письма обменивается на токен без '
+            'обращения к базе.'
+        )
+        api_client = APIClient()
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}'
+        )
+        response = api_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == SIGNUP_DATA['username']
+
+        assert obtain(client, code).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что код подтверждения одноразовый.'
+        )
+
+    def test_02_new_signup_replaces_code(self, client, settings):
+        settings.SIGNUP_COALESCE_TIMEOUT = 0
+        client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        old_code = get_code()
+        client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        assert len(mail.outbox) == 2
+        assert obtain(client, old_code).status_code == (
+            HTTPStatus.BAD_REQUEST
+        ), 'Проверьте, что новый код заменяет предыдущий.'
+        assert obtain(client, get_code()).status_code == HTTPStatus.OK
+
+    def test_03_attempts_limited(self, client, settings):
+        settings.CONFIRMATION_CODE_MAX_ATTEMPTS = 3
+        client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        code = get_code()
+        for _ in range(3):
+            assert obtain(client, 'wrong').status_code == (
+                HTTPStatus.BAD_REQUEST
+            )
+        assert obtain(client, code).status_code == (
+            HTTPStatus.TOO_MANY_REQUESTS
+        ), (
+            'Проверьте, что после `CONFIRMATION_CODE_MAX_ATTEMPTS` '
+            'неверных попыток код не принимается.'
+        )
+
+        client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        assert len(mail.outbox) == 2, (
+            'Проверьте, что после аннулирования кода можно сразу '
+            'запросить новый.'
+        )
+        assert obtain(client, code).status_code == HTTPStatus.BAD_REQUEST
+        assert obtain(client, get_code()).status_code == HTTPStatus.OK
+
+    def test_04_unknown_user(self, client):
+        assert obtain(client, 'code', 'nobody').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+
+    def test_05_role_change_revokes_code(self, client):
+        from users.models import User
+
+        client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        code = get_code()
+        user = User.objects.get(username=SIGNUP_DATA['username'])
+        user.role = 'moderator'
+        user.save()
+        assert obtain(client, code).status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что смена роли аннулирует выданный код, '
+            'хранящий прежние права.'
+        )
+
+    def test_06_code_survives_response_cache_traffic(self, client):
+        client.post(SIGNUP_URL, data=SIGNUP_DATA)
+        code = get_code()
+        # Больше записей, чем MAX_ENTRIES кэша ответов.
+        for offset in range(400):
+            APIClient().get(f'/api/v1/titles/?offset={offset}')
+        assert obtain(client, code).status_code == HTTPStatus.OK, (
+            'Проверьте, что коды подтверждения не вытесняются '
+            'закэшированными ответами API.'
+        )
@@ -0,0 +1,128 @@
+from http import HTTPStatus
+
+import pytest
+from rest_framework.test import APIClient
+
+REFRESH_URL = '/api/v1/auth/token/refresh/'
+
+
+def refresh(client, token):
+    return client.post(REFRESH_URL, data={'refresh': token})
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23RefreshToken:
+
+    def test_01_rotation(self, client, user, django_assert_num_queries):
+        from users.registration.token_generator import get_token_for_user
+
+        tokens = get_token_for_user(user)
+        assert 'refresh' in tokens
+        response = refresh(client, tokens['refresh'])
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что `{REFRESH_URL}` выдаёт новую пару токенов.'
+        )
+        new_tokens = response.json()
+        assert new_tokens['refresh'] != tokens['refresh']
+        api_client = APIClient()
+        api_client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {new_tokens["token"]}'
+        )
+        assert api_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.OK
+        )
+
+        assert refresh(client, tokens['refresh']).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что использованный refresh-токен отзывается.'
+        # Только запись об отзыве старого токена: BEGIN и INSERT.
+        with django_assert_num_queries(2):
+            response = refresh(client, new_tokens['refresh'])
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что обновление токена обращается к базе только '
+            'для записи об отзыве.'
+        )
+
+    def test_02_expired_access_header_ignored(self, client, user):
+        from users.registration.token_generator import get_token_for_user
+
+        tokens = get_token_for_user(user)
+        client.defaults['HTTP_AUTHORIZATION'] = 'Bearer expired'
+        assert refresh(client, tokens['refresh']).status_code == (
+            HTTPStatus.OK
+        )
+
+    def test_03_invalid_tokens(self, client, user):
+        from users.registration.token_generator import get_token_for_user
+
+        assert refresh(client, 'garbage').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert client.post(REFRESH_URL).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        access = get_token_for_user(user)['token']
+        assert refresh(client, access).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что access-токен нельзя использовать как refresh.'
+
+    def test_04_role_change_requires_new_code(self, client, user):
+        from users.registration.token_generator import get_token_for_user
+
+        tokens = get_token_for_user(user)
+        user.role = 'moderator'
+        user.save()
+        assert refresh(client, tokens['refresh']).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что refresh-токен, выданный до смены роли, '
+            'не обновляется.'
+        )
+
+    def test_05_revoked_in_database(self, client, user):
+        from django.core.cache import cache
+
+        from users.constants import TOKEN_STATE_CACHE_KEY
+        from users.models import RevokedToken
+        from users.registration.token_generator import get_token_for_user
+
+        token = get_token_for_user(user)['refresh']
+        used = []
+        for _ in range(3):
+            used.append(token)
+            token = refresh(client, token).json()['refresh']
+        assert RevokedToken.objects.count() == 3, (
+            'Проверьте, что отзыв токена записывается в базу до выдачи '
+            'новой пары.'
+        )
+        # Кэш другого процесса ещё считает токены действующими.
+        for jti in RevokedToken.objects.values_list('jti', flat=True):
+            cache.set(TOKEN_STATE_CACHE_KEY.format(jti), 'issued')
+        for token in used:
+            assert refresh(client, token).status_code == (
+                HTTPStatus.UNAUTHORIZED
+            ), (
+                'Проверьте, что отозванный токен не обновляется, даже если '
+                'кэш процесса считает его действующим.'
+            )
+        cache.clear()
+        for token in used:
+            assert refresh(client, token).status_code == (
+                HTTPStatus.UNAUTHORIZED
+            ), (
+                'Проверьте, что после потери кэша отозванные токены '
+                'находятся в базе.'
+            )
+
+    def test_06_revoke_once(self, user):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        from users.registration import blacklist
+
+        token = RefreshToken.for_user(user)
+        blacklist.register(token)
+        assert blacklist.revoke(token) is True
+        assert blacklist.revoke(token) is False, (
+            'Проверьте, что токен нельзя отозвать дважды.'
+        )
+        assert blacklist.is_revoked(token)
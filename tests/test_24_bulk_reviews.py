@@ -0,0 +1,194 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from tests.utils import create_titles, record_query_params
+
+BULK_URL = '/api/v1/reviews/bulk/'
+
+
+def post_bulk(client, payload):
+    return client.post(BULK_URL, data=payload, format='json')
+
+
+def make_authors(django_user_model, count):
+    django_user_model.objects.bulk_create([
+        django_user_model(username=f'author{idx}',
+                          email=f'author{idx}@yamdb.fake')
+        for idx in range(count)
+    ])
+    return [f'author{idx}' for idx in range(count)]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24BulkReviews:
+
+    def test_01_bulk_create(self, admin_client, admin, django_user_model):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        authors = make_authors(django_user_model, 3)
+        payload = [
+            {'title': title['id'], 'author': author, 'text': 'Отзыв',
+             'score': idx + 1}
+            for idx, author in enumerate(authors)
+            for title in titles
+        ]
+        payload.append({'title': titles[0]['id'], 'text': 'Свой', 'score': 9})
+        response = post_bulk(admin_client, payload)
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос администратора к `{BULK_URL}` с '
+            'корректными данными возвращает ответ со статусом 201.'
+        )
+        assert response.json() == {'created': len(payload)}
+        assert Review.objects.count() == len(payload)
+        assert Review.objects.filter(author=admin).count() == 1, (
+            'Проверьте, что отзыв без `author` создаётся от имени автора '
+            'запроса.'
+        )
+        first, second = (
+            Title.objects.get(pk=title['id']) for title in titles
+        )
+        assert (first.rating_sum, first.review_count) == (15, 4)
+        assert (second.rating_sum, second.review_count) == (6, 3), (
+            'Проверьте, что массовое создание отзывов обновляет сохранённый '
+            'рейтинг произведений.'
+        )
+
+    def test_02_constant_queries(self, admin_client, django_user_model):
+        titles, _, _ = create_titles(admin_client)
+        authors = make_authors(django_user_model, 40)
+        counts = []
+        for chunk in (authors[:5], authors[5:]):
+            payload = [
+                {'title': title['id'], 'author': author, 'text': 'Отзыв',
+                 'score': 5}
+                for author in chunk
+                for title in titles
+            ]
+            with CaptureQueriesContext(connection) as context:
+                response = post_bulk(admin_client, payload)
+            assert response.status_code == HTTPStatus.CREATED
+            counts.append(len(context.captured_queries))
+        assert counts[0] == counts[1], (
+            'Проверьте, что число SQL-запросов не зависит от размера пачки.'
+        )
+
+    def test_03_conflicts(self, admin_client, django_user_model):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        authors = make_authors(django_user_model, 2)
+        response = post_bulk(admin_client, [
+            {'title': titles[0]['id'], 'author': authors[0], 'text': 'А',
+             'score': 5},
+        ])
+        assert response.status_code == HTTPStatus.CREATED
+        payload = [
+            {'title': titles[1]['id'], 'author': authors[0], 'text': 'Б',
+             'score': 5},
+            {'title': titles[0]['id'], 'author': authors[0], 'text': 'В',
+             'score': 5},
+            {'title': titles[1]['id'], 'author': authors[1], 'text': 'Г',
+             'score': 5},
+            {'title': titles[1]['id'], 'author': authors[1], 'text': 'Д',
+             'score': 5},
+            {'title': 100500, 'author': authors[1], 'text': 'Е',
+             'score': 5},
+            {'title': titles[0]['id'], 'author': 'nobody', 'text': 'Ж',
+             'score': 5},
+        ]
+        response = post_bulk(admin_client, payload)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert errors[0] == {} and errors[2] == {}
+        assert 'non_field_errors' in errors[1], (
+            'Проверьте, что отзыв на произведение, у которого уже есть '
+            'отзыв того же автора, отклоняется.'
+        )
+        assert 'non_field_errors' in errors[3], (
+            'Проверьте, что повтор пары (автор, произведение) внутри пачки '
+            'отклоняется.'
+        )
+        assert 'title' in errors[4]
+        assert 'author' in errors[5]
+        assert Review.objects.count() == 1, (
+            'Проверьте, что при ошибке в пачке не создаётся ни один отзыв.'
+        )
+
+    def test_04_field_validation(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = post_bulk(admin_client, [
+            {'title': titles[0]['id'], 'text': 'Ок', 'score': 5},
+            {'title': titles[1]['id'], 'text': '  ', 'score': 11},
+        ])
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert errors[0] == {}
+        assert set(errors[1]) == {'text', 'score'}
+        assert post_bulk(admin_client, []).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+        assert post_bulk(admin_client, {'title': 1}).status_code == (
+            HTTPStatus.BAD_REQUEST
+        )
+
+    def test_05_size_limit(self, admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        settings.BULK_REVIEWS_MAX = 1
+        response = post_bulk(admin_client, [
+            {'title': title['id'], 'text': 'Отзыв', 'score': 5}
+            for title in titles
+        ])
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_06_permissions(self, user_client, moderator_client):
+        payload = [{'title': 1, 'text': 'Отзыв', 'score': 5}]
+        assert post_bulk(APIClient(), payload).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        for forbidden in (user_client, moderator_client):
+            assert post_bulk(forbidden, payload).status_code == (
+                HTTPStatus.FORBIDDEN
+            ), (
+                f'Проверьте, что `{BULK_URL}` доступен только '
+                'администратору.'
+            )
+
+    def test_07_within_query_params(self, admin_client, admin,
+                                    django_user_model):
+        from reviews.models import Review
+
+        titles, _, _ = create_titles(admin_client)
+        authors = make_authors(django_user_model, 1200)
+        payload = [
+            {'title': titles[idx % 2]['id'], 'author': author,
+             'text': 'Отзыв', 'score': 5}
+            for idx, author in enumerate(authors)
+        ]
+        Review.objects.create(
+            title_id=titles[1]['id'], author=django_user_model.objects.get(
+                username=authors[-1]
+            ), text='Уже есть', score=5,
+        )
+        response = post_bulk(admin_client, payload)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()
+        assert 'non_field_errors' in errors[-1], (
+            'Проверьте, что повтор отзыва находится и за пределами первой '
+            'пачки запроса.'
+        )
+        assert not any(errors[:-1])
+        with record_query_params() as params:
+            response = post_bulk(admin_client, payload[:-1])
+        assert response.status_code == HTTPStatus.CREATED
+        assert Review.objects.count() == len(payload)
+        limit = connection.features.max_query_params
+        if limit:
+            assert max(params) <= limit, (
+                'Проверьте, что проверка пачки отзывов не превышает число '
+                'параметров запроса, которое допускает база.'
+            )
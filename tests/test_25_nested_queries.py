@@ -0,0 +1,127 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.test_17_stateless_jwt import stateless_client
+
+
+@pytest.fixture
+def nested(admin, user, moderator):
+    from reviews.models import Comment, Review, Title
+
+    title = Title.objects.create(name='Терминатор', year=1984)
+    other_title = Title.objects.create(name='Чужой', year=1979)
+    review = Review.objects.create(
+        title=title, author=moderator, text='Отзыв', score=7
+    )
+    comment = Comment.objects.create(
+        reviews=review, author=user, text='Комментарий'
+    )
+    client = stateless_client(user)
+    # Версия токенов попадает в кэш, дальше аутентификация без запросов.
+    client.get('/api/v1/users/me/')
+    return client, title, other_title, review, comment
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25NestedQueries:
+    REVIEWS = '/api/v1/titles/{title}/reviews/'
+    REVIEW = '/api/v1/titles/{title}/reviews/{review}/'
+    COMMENTS = '/api/v1/titles/{title}/reviews/{review}/comments/'
+    COMMENT = '/api/v1/titles/{title}/reviews/{review}/comments/{comment}/'
+
+    def url(self, pattern, title, review, comment):
+        return pattern.format(
+            title=title.pk, review=review.pk, comment=comment.pk
+        )
+
+    @pytest.mark.parametrize('method, pattern, data, status, queries', (
+        # Произведение, COUNT и страница отзывов.
+        ('get', REVIEWS, None, HTTPStatus.OK, 3),
+        # Отзыв ищется сразу с условием на произведение.
+        ('get', REVIEW, None, HTTPStatus.OK, 1),
+        # Произведение вместе с проверкой повторного отзыва, вставка,
+        # рейтинг и BEGIN транзакции.
+        ('post', REVIEWS, {'text': 'Новый', 'score': 5},
+         HTTPStatus.CREATED, 4),
+        # Отзыв, блокировка старой оценки, сохранение, рейтинг, BEGIN.
+        ('patch', REVIEW, {'score': 9}, HTTPStatus.OK, 5),
+        # Отзыв с проверкой произведения, COUNT и страница комментариев.
+        ('get', COMMENTS, None, HTTPStatus.OK, 3),
+        ('get', COMMENT, None, HTTPStatus.OK, 1),
+        # Отзыв с проверкой произведения и вставка.
+        ('post', COMMENTS, {'text': 'Новый'}, HTTPStatus.CREATED, 2),
+        ('patch', COMMENT, {'text': 'Исправлен'}, HTTPStatus.OK, 2),
+        ('delete', COMMENT, None, HTTPStatus.NO_CONTENT, 2),
+    ))
+    def test_01_nested_query_count(self, nested, django_assert_num_queries,
+                                   method, pattern, data, status, queries):
+        client, title, _, review, comment = nested
+        if method == 'post' and pattern == self.REVIEWS:
+            review.delete()
+        elif method == 'patch' and pattern == self.REVIEW:
+            client = stateless_client(review.author)
+            client.get('/api/v1/users/me/')
+        url = self.url(pattern, title, review, comment)
+        with django_assert_num_queries(queries):
+            response = getattr(client, method)(url, data=data)
+        assert response.status_code == status, (
+            f'Проверьте, что {method.upper()}-запрос к `{pattern}` '
+            f'возвращает статус {status}.'
+        )
+
+    def test_02_created_author(self, nested):
+        client, title, _, review, comment = nested
+        response = client.post(
+            self.url(self.COMMENTS, title, review, comment),
+            data={'text': 'Новый'},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == 'TestUser', (
+            'Проверьте, что в ответе на создание комментария указан его '
+            'автор.'
+        )
+
+    def test_03_duplicate_review(self, nested, django_assert_num_queries):
+        client, title, _, review, comment = nested
+        url = self.url(self.REVIEWS, title, review, comment)
+        assert client.post(
+            url, data={'text': 'Первый', 'score': 5}
+        ).status_code == HTTPStatus.CREATED
+        with django_assert_num_queries(1):
+            response = client.post(url, data={'text': 'Второй', 'score': 5})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв на произведение отклоняется '
+            'одним запросом к базе.'
+        )
+
+    @pytest.mark.parametrize('method, pattern', (
+        ('get', COMMENTS),
+        ('post', COMMENTS),
+        ('get', COMMENT),
+        ('patch', COMMENT),
+        ('delete', COMMENT),
+        ('get', REVIEW),
+    ))
+    def test_04_foreign_title(self, nested, method, pattern):
+        from reviews.models import Comment
+
+        client, _, other_title, review, comment = nested
+        response = getattr(client, method)(
+            self.url(pattern, other_title, review, comment),
+            data={'text': 'Текст'},
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что отзыв и его комментарии недоступны по адресу '
+            'чужого произведения.'
+        )
+        assert Comment.objects.get(pk=comment.pk).text == 'Комментарий'
+
+    def test_05_missing_title(self, nested):
+        client, title, _, review, comment = nested
+        title.delete()
+        response = client.get(self.url(self.REVIEWS, title, review, comment))
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что список отзывов несуществующего произведения '
+            'возвращает статус 404.'
+        )
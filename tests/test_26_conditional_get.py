@@ -0,0 +1,186 @@
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+import pytest
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from tests.test_17_stateless_jwt import stateless_client
+
+
+@pytest.fixture
+def title(moderator):
+    from reviews.models import Categories, Genres, Review, Title, TitleGenres
+
+    category = Categories.objects.create(name='Фильм', slug='films')
+    genre = Genres.objects.create(name='Ужасы', slug='horror')
+    title = Title.objects.create(name='Чужой', year=1979, category=category)
+    TitleGenres.objects.create(title=title, genre=genre)
+    Review.objects.create(title=title, author=moderator, text='Да', score=9)
+    # Отметка в прошлом: изменения в тесте не попадут в ту же секунду.
+    Title.objects.filter(pk=title.pk).update(
+        updated_at=datetime(2020, 1, 1, tzinfo=timezone.utc)
+    )
+    return title
+
+
+def anonymous_client(user):
+    return APIClient()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26ConditionalGet:
+
+    @pytest.mark.parametrize('make_client', (
+        anonymous_client, stateless_client
+    ))
+    @pytest.mark.parametrize('path', ('', 'reviews/'))
+    def test_01_not_modified(self, title, user, make_client, path,
+                             django_assert_num_queries):
+        client = make_client(user)
+        url = f'/api/v1/titles/{title.pk}/{path}'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response['ETag']
+        assert response['Last-Modified'] == http_date(
+            datetime(2020, 1, 1, tzinfo=timezone.utc).timestamp()
+        ), (
+            f'Проверьте, что ответ `{url}` содержит заголовок '
+            '`Last-Modified` с датой изменения произведения.'
+        )
+        with django_assert_num_queries(1):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-None-Match` возвращает 304 одним запросом к базе.'
+        )
+        assert response['ETag'] == etag
+        with django_assert_num_queries(1):
+            response = client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            '`If-Modified-Since` возвращает 304.'
+        )
+        response = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(1500000000)
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_query_params_in_etag(self, client, title):
+        url = f'/api/v1/titles/{title.pk}/reviews/'
+        first = client.get(f'{url}?limit=1')
+        assert client.get(
+            f'{url}?limit=2', HTTP_IF_NONE_MATCH=first['ETag']
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что ETag списка отзывов зависит от параметров '
+            'пагинации.'
+        )
+
+    def test_03_review_changes(self, client, title, user_client, user):
+        from reviews.models import Review
+
+        detail_url = f'/api/v1/titles/{title.pk}/'
+        reviews_url = f'{detail_url}reviews/'
+        etags = {
+            url: client.get(url)['ETag'] for url in (detail_url, reviews_url)
+        }
+        response = user_client.post(
+            reviews_url, data={'text': 'Неплохо', 'score': 5}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        for url, etag in etags.items():
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                f'Проверьте, что после создания отзыва `{url}` '
+                'отдаётся заново.'
+            )
+            etags[url] = response['ETag']
+        assert response.json()['count'] == 2
+
+        review = Review.objects.get(author=user)
+        user_client.patch(f'{reviews_url}{review.pk}/', data={'text': 'Ок'})
+        response = client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=etags[reviews_url]
+        )
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение текста отзыва меняет ETag списка '
+            'отзывов.'
+        )
+        etags[reviews_url] = response['ETag']
+
+        user_client.delete(f'{reviews_url}{review.pk}/')
+        assert client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=etags[reviews_url]
+        ).status_code == HTTPStatus.OK
+
+    def test_04_related_changes(self, client, admin_client, title, moderator):
+        detail_url = f'/api/v1/titles/{title.pk}/'
+        reviews_url = f'{detail_url}reviews/'
+
+        etag = client.get(detail_url)['ETag']
+        admin_client.patch(detail_url, data={'name': 'Чужие'})
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['name'] == 'Чужие'
+
+        etag = response['ETag']
+        admin_client.delete('/api/v1/categories/films/')
+        response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление категории меняет ETag её произведений.'
+        )
+        assert response.json()['category'] is None
+
+        etag = client.get(reviews_url)['ETag']
+        admin_client.patch(
+            f'/api/v1/users/{moderator.username}/', data={'username': 'Modr'}
+        )
+        response = client.get(reviews_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что переименование автора меняет ETag списков '
+            'его отзывов.'
+        )
+        assert response.json()['results'][0]['author'] == 'Modr'
+
+    def test_05_bulk_reviews(self, client, admin_client, title, user):
+        url = f'/api/v1/titles/{title.pk}/'
+        etag = client.get(url)['ETag']
+        response = admin_client.post(
+            '/api/v1/reviews/bulk/',
+            data=[{'title': title.pk, 'author': user.username,
+                   'text': 'Импорт', 'score': 3}],
+            format='json',
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что массовое создание отзывов меняет ETag '
+            'произведения.'
+        )
+
+    def test_06_same_second_write(self, client, title):
+        from reviews.models import Title
+
+        # Отметка в секунде, которая ещё не закончилась.
+        stamp = time.time() + 5
+        Title.objects.filter(pk=title.pk).update(
+            updated_at=datetime.fromtimestamp(stamp, tz=timezone.utc)
+        )
+        url = f'/api/v1/titles/{title.pk}/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert 'ETag' in response
+        assert 'Last-Modified' not in response, (
+            'Проверьте, что `Last-Modified` не отдаётся, пока не прошла '
+            'секунда изменения: в ней возможна ещё одна запись.'
+        )
+        assert client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(stamp)
+        ).status_code == HTTPStatus.OK
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == HTTPStatus.NOT_MODIFIED
@@ -0,0 +1,198 @@
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+URL = '/api/v1/titles/'
+
+
+def assert_refreshed(client, url, etag, reason):
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        f'Проверьте, что кэш `{URL}` сбрасывается при {reason}.'
+    )
+    return response
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27TitlesCache:
+
+    def test_01_anonymous_list_cached(self, client, admin_client,
+                                      django_assert_num_queries):
+        titles, _, genres = create_titles(admin_client)
+        response = client.get(
+            f'{URL}?genre={genres[0]["slug"]}&limit=1&offset=0'
+        )
+        assert response.status_code == HTTPStatus.OK
+        with django_assert_num_queries(0):
+            cached = client.get(
+                f'{URL}?offset=0&limit=1&genre={genres[0]["slug"]}'
+            )
+        assert cached.json() == response.json(), (
+            f'Проверьте, что анонимный ответ `{URL}` с фильтрами '
+            'кэшируется независимо от порядка параметров.'
+        )
+        assert cached['ETag'] == response['ETag']
+        assert cached.json()['results'][0]['id'] == titles[0]['id']
+
+        other = client.get(f'{URL}?genre={genres[2]["slug"]}')
+        assert [title['id'] for title in other.json()['results']] == [
+            titles[1]['id']
+        ], (
+            'Проверьте, что разные фильтры кэшируются под разными ключами.'
+        )
+
+    def test_02_authenticated_not_cached(self, admin_client, user_client):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        create_titles(admin_client)
+        user_client.get(URL)
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(URL)
+        assert response.status_code == HTTPStatus.OK
+        assert any(
+            'reviews_title' in query['sql']
+            for query in context.captured_queries
+        ), (
+            f'Проверьте, что ответы `{URL}` для пользователей с токеном '
+            'не кэшируются.'
+        )
+
+    def test_03_invalidation(self, client, admin_client, user_client, user):
+        from reviews.models import Title
+
+        titles, categories, genres = create_titles(admin_client)
+        etag = client.get(URL)['ETag']
+
+        Title.objects.filter(pk=titles[0]['id']).get().save()
+        etag = assert_refreshed(
+            client, URL, etag, 'сохранении произведения'
+        )['ETag']
+
+        admin_client.patch(
+            f'{URL}{titles[0]["id"]}/', data={'genre': [genres[2]['slug']]}
+        )
+        response = assert_refreshed(
+            client, URL, etag, 'изменении жанров произведения'
+        )
+        assert [genre['slug'] for genre in next(
+            title['genre'] for title in response.json()['results']
+            if title['id'] == titles[0]['id']
+        )] == [genres[2]['slug']]
+        etag = response['ETag']
+
+        user_client.post(
+            f'{URL}{titles[0]["id"]}/reviews/', data={'text': 'Да', 'score': 8}
+        )
+        response = assert_refreshed(client, URL, etag, 'создании отзыва')
+        assert next(
+            title['rating'] for title in response.json()['results']
+            if title['id'] == titles[0]['id']
+        ) == 8
+        etag = response['ETag']
+
+        admin_client.post(
+            '/api/v1/reviews/bulk/',
+            data=[{'title': titles[1]['id'], 'author': user.username,
+                   'text': 'Импорт', 'score': 4}],
+            format='json',
+        )
+        etag = assert_refreshed(
+            client, URL, etag, 'массовом создании отзывов'
+        )['ETag']
+
+        admin_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+        response = assert_refreshed(client, URL, etag, 'удалении категории')
+        assert next(
+            title['category'] for title in response.json()['results']
+            if title['id'] == titles[0]['id']
+        ) is None
+
+    def test_04_stampede(self):
+        from api.cache import get_or_compute
+
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'count': 1}
+
+        def worker():
+            results.append(get_or_compute('stampede', compute, 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1, (
+            'Проверьте, что при одновременных промахах ответ пересчитывает '
+            'только один запрос.'
+        )
+        assert sorted(hit for _, hit in results) == [
+            False, True, True, True, True
+        ]
+        assert all(value == {'count': 1} for value, _ in results)
+
+    def test_05_lock_wait_limited(self, settings):
+        from api.cache import get_cache, get_or_compute
+
+        settings.API_CACHE_LOCK_WAIT = 0.1
+        get_cache().add('lock:stuck', True, 60)
+        start = time.monotonic()
+        value, hit = get_or_compute('stuck', lambda: 'fresh', 60)
+        assert (value, hit) == ('fresh', False)
+        assert time.monotonic() - start < 1, (
+            'Проверьте, что запрос не ждёт чужую блокировку дольше '
+            '`API_CACHE_LOCK_WAIT`.'
+        )
+        assert get_cache().get('lock:stuck'), (
+            'Проверьте, что запрос не снимает чужую блокировку.'
+        )
+
+    def test_06_hit_miss_counters(self, client, admin_client):
+        create_titles(admin_client)
+        admin_client.delete('/api/v1/stats/')
+        client.get(URL)
+        client.get(URL)
+        client.get(f'{URL}?limit=1')
+        stats = admin_client.get('/api/v1/stats/').json()['response_cache']
+        assert stats['titles'] == {
+            'hits': 1, 'misses': 2, 'hit_ratio': 1 / 3
+        }, (
+            'Проверьте, что `/api/v1/stats/` показывает попадания '
+            'и промахи кэша списка произведений.'
+        )
+        admin_client.delete('/api/v1/stats/')
+        stats = admin_client.get('/api/v1/stats/').json()['response_cache']
+        assert stats['titles']['hits'] == 0
+
+    def test_07_bump_once_per_transaction(self):
+        from django.db import transaction
+
+        from api.cache import bump_version_on_commit, get_version
+
+        version = get_version('dedup')
+        with transaction.atomic():
+            for _ in range(3):
+                bump_version_on_commit('dedup')
+            assert get_version('dedup') == version
+        assert get_version('dedup') == version + 1, (
+            'Проверьте, что версия сдвигается один раз после фиксации '
+            'транзакции.'
+        )
+        with pytest.raises(RuntimeError), transaction.atomic():
+            bump_version_on_commit('dedup')
+            raise RuntimeError
+        with transaction.atomic():
+            bump_version_on_commit('dedup')
+        assert get_version('dedup') == version + 2, (
+            'Проверьте, что после отката транзакции версия снова '
+            'сдвигается при следующей фиксации.'
+        )
@@ -0,0 +1,135 @@
+import io
+import json
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from http import HTTPStatus
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from tests.utils import create_reviews
+
+SAMPLE = {
+    'aware': datetime(2023, 5, 29, 14, 13, 1, 123456, tzinfo=timezone.utc),
+    'offset': datetime(
+        2023, 5, 29, 14, 13, tzinfo=timezone(timedelta(hours=3))
+    ),
+    'naive': datetime(2023, 5, 29, 14, 13),
+    'date': date(2023, 5, 29),
+    'time': time(14, 13, 1, 500),
+    'duration': timedelta(minutes=90),
+    'decimal': Decimal('7.50'),
+    'lazy': gettext_lazy('Отзыв'),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'bytes': b'raw',
+    1: 'целый ключ',
+    'separators': 'строка\u2028абзац\u2029',
+    'nested': [{'score': 10, 'rating': None, 'tuple': (1, 2)}],
+    'unicode': 'Терминатор 🤖',
+}
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28JSONRenderer:
+
+    def test_01_same_bytes_as_json_renderer(self):
+        from api.renderers import FastJSONRenderer
+
+        assert FastJSONRenderer().render(SAMPLE) == (
+            JSONRenderer().render(SAMPLE)
+        ), (
+            'Проверьте, что FastJSONRenderer выводит даты, Decimal, '
+            'ленивые строки и прочие типы так же, как JSONRenderer.'
+        )
+        assert FastJSONRenderer().render(None) == b''
+
+    @pytest.mark.parametrize('data, media_type, context', (
+        ({'big': 2 ** 70}, None, None),
+        (SAMPLE, 'application/json; indent=4', None),
+        (SAMPLE, None, {'indent': 2}),
+    ))
+    def test_02_fallback(self, data, media_type, context):
+        from api.renderers import FastJSONRenderer
+
+        assert FastJSONRenderer().render(data, media_type, context) == (
+            JSONRenderer().render(data, media_type, context)
+        ), (
+            'Проверьте, что FastJSONRenderer использует JSONRenderer для '
+            'отступов и данных, которые не поддерживает orjson.'
+        )
+
+    def test_03_without_orjson(self, monkeypatch):
+        from api import parsers, renderers
+
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+        assert renderers.FastJSONRenderer().render(SAMPLE) == (
+            JSONRenderer().render(SAMPLE)
+        )
+        assert parsers.FastJSONParser().parse(
+            io.BytesIO(b'{"score": 5}')
+        ) == {'score': 5}
+
+    def test_04_parser(self):
+        from api.parsers import FastJSONParser
+
+        body = JSONRenderer().render({'text': 'Отзыв', 'score': 5, 'x': []})
+        assert FastJSONParser().parse(io.BytesIO(body)) == (
+            JSONParser().parse(io.BytesIO(body))
+        )
+        body = '{"text": "Отзыв"}'.encode('cp1251')
+        assert FastJSONParser().parse(
+            io.BytesIO(body), parser_context={'encoding': 'cp1251'}
+        ) == {'text': 'Отзыв'}
+        for body in (b'{"text": ', b'{"score": NaN}', b'\xff'):
+            with pytest.raises(ParseError):
+                FastJSONParser().parse(io.BytesIO(body))
+
+    def test_05_api_uses_fast_json(self, admin_client, moderator,
+                                   moderator_client, user_client):
+        from rest_framework.settings import api_settings
+
+        from api.parsers import FastJSONParser
+        from api.renderers import FastJSONRenderer
+
+        assert api_settings.DEFAULT_RENDERER_CLASSES[0] is FastJSONRenderer
+        assert api_settings.DEFAULT_PARSER_CLASSES[0] is FastJSONParser
+        _, titles = create_reviews(
+            admin_client, {moderator: moderator_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.content == JSONRenderer().render(response.data), (
+            'Проверьте, что ответы API совпадают с ответами JSONRenderer.'
+        )
+        assert response.json()['results'][0]['pub_date'].endswith('Z')
+
+        response = user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data=json.dumps({'text': 'Отлично', 'score': 10}),
+            content_type='application/json',
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        response = user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data='{"text": ', content_type='application/json',
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_06_benchmark(self):
+        from api.benchmark import run_json_benchmark, seed
+
+        seed(titles=10, users=2, reviews_per_title=2, comments_per_review=0)
+        report = run_json_benchmark(items=10, repeat=2)
+        assert [page['page'] for page in report['pages']] == [
+            'titles', 'reviews'
+        ]
+        for page in report['pages']:
+            assert page['items'] == 10
+            for kind in ('render', 'parse'):
+                assert set(page[kind]) == {'json_ms', 'orjson_ms', 'speedup'}
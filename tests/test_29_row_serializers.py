@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments
+
+
+@pytest.fixture
+def catalog(admin_client, admin, user_client, user, moderator_client,
+            moderator):
+    from reviews.models import Review, Title
+    from reviews.rating import rebuild_ratings
+
+    author_map = {
+        admin: admin_client,
+        user: user_client,
+        moderator: moderator_client,
+    }
+    comments = create_comments(admin_client, author_map)
+    titles = list(Title.objects.order_by('pk'))
+    # Произведения без категории, жанров и описания и с нулевым рейтингом.
+    Title.objects.create(name='Без категории', year=2000)
+    Title.objects.create(name='Нулевой', year=2001, description='Пусто')
+    zero = Title.objects.get(name='Нулевой')
+    Review.objects.create(title=zero, author=user, text='Ноль', score=0)
+    Review.objects.create(
+        title=titles[1], author=user, text='Строка\u2028строка', score=7
+    )
+    rebuild_ratings()
+    return titles, Review.objects.filter(title=titles[0]).first(), comments
+
+
+def fetch_both(client, url, views, monkeypatch):
+    """Ответы по url через сериализатор строк и через ModelSerializer."""
+    fast = client.get(url)
+    with monkeypatch.context() as patch:
+        for view in views:
+            patch.setattr(view, 'row_serializer_class', None)
+        slow = client.get(url)
+    return fast, slow
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29RowSerializers:
+
+    def test_01_titles_parity(self, catalog, admin_client, monkeypatch):
+        from api.views import TitleViewSet
+
+        urls = [
+            '/api/v1/titles/',
+            '/api/v1/titles/?limit=2&offset=1',
+            '/api/v1/titles/?genre=horror',
+            '/api/v1/titles/?category=films',
+            '/api/v1/titles/?year=1984',
+            '/api/v1/titles/?name=Кре',
+            '/api/v1/titles/?search=орешек',
+        ]
+        for url in urls:
+            fast, slow = fetch_both(
+                admin_client, url, (TitleViewSet,), monkeypatch
+            )
+            assert fast.status_code == slow.status_code == HTTPStatus.OK
+            assert fast.content == slow.content, (
+                f'Проверьте, что ответ `{url}` побайтно совпадает с ответом '
+                'ShowTitlesSerializer.'
+            )
+        response = admin_client.get('/api/v1/titles/?limit=10').json()
+        assert {title['rating'] for title in response['results']} >= {
+            None, 5, 7
+        }
+
+    def test_02_reviews_and_comments_parity(self, catalog, client,
+                                            monkeypatch):
+        from api.views import CommentViewSet, ReviewViewSet
+
+        titles, review, _ = catalog
+        base = f'/api/v1/titles/{titles[0].pk}/reviews/'
+        urls = [
+            base,
+            f'{base}?limit=1&offset=1',
+            f'{base}?cursor=&limit=2',
+            f'/api/v1/titles/{titles[1].pk}/reviews/',
+            f'{base}{review.pk}/comments/',
+            f'{base}{review.pk}/comments/?limit=1&offset=2',
+            f'{base}{review.pk}/comments/?cursor=&limit=1',
+        ]
+        for url in urls:
+            fast, slow = fetch_both(
+                client, url, (ReviewViewSet, CommentViewSet), monkeypatch
+            )
+            assert fast.status_code == slow.status_code == HTTPStatus.OK
+            assert fast.content == slow.content, (
+                f'Проверьте, что ответ `{url}` побайтно совпадает с ответом '
+                'ModelSerializer.'
+            )
+            next_url = fast.json()['next']
+            if next_url and 'cursor=' in next_url:
+                fast, slow = fetch_both(
+                    client, next_url, (ReviewViewSet, CommentViewSet),
+                    monkeypatch,
+                )
+                assert fast.content == slow.content
+
+    def test_03_list_query_count(self, catalog, client,
+                                 django_assert_num_queries):
+        titles, review, _ = catalog
+        # Произведение, COUNT и страница отзывов вместе с авторами.
+        with django_assert_num_queries(3):
+            client.get(f'/api/v1/titles/{titles[0].pk}/reviews/')
+        # COUNT, произведения с категориями и жанры страницы.
+        with django_assert_num_queries(3):
+            client.get('/api/v1/titles/')
@@ -0,0 +1,118 @@
+import gzip
+import json
+import math
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+URL = '/api/v1/titles/export/'
+
+
+def read_lines(response):
+    content = b''.join(response.streaming_content)
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30TitlesExport:
+
+    def test_01_permissions(self, client, user_client, moderator_client,
+                            admin_client):
+        create_titles(admin_client)
+        assert client.get(URL).status_code == HTTPStatus.UNAUTHORIZED
+        for role_client in (user_client, moderator_client):
+            assert role_client.get(URL).status_code == HTTPStatus.FORBIDDEN, (
+                f'Проверьте, что `{URL}` доступен только администратору.'
+            )
+        response = admin_client.get(URL, HTTP_ACCEPT='application/x-ndjson')
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming, (
+            f'Проверьте, что `{URL}` отдаёт ответ потоком.'
+        )
+        assert response['Content-Type'] == 'application/x-ndjson'
+        assert 'attachment' in response['Content-Disposition']
+
+    def test_02_same_items_as_list(self, admin_client):
+        from reviews.models import Title
+
+        create_titles(admin_client)
+        Title.objects.create(name='Без категории', year=2000)
+        count = Title.objects.count()
+        titles = admin_client.get(
+            f'/api/v1/titles/?limit={count}'
+        ).json()['results']
+        lines = read_lines(admin_client.get(URL))
+        assert lines == sorted(titles, key=lambda title: title['id']), (
+            f'Проверьте, что `{URL}` выводит по строке на каждое произведение '
+            'в формате элементов списка `/api/v1/titles/`.'
+        )
+
+    def test_03_filters(self, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        response = admin_client.get(f'{URL}?genre={genres[2]["slug"]}')
+        lines = read_lines(response)
+        assert [line['id'] for line in lines] == [titles[1]['id']], (
+            f'Проверьте, что `{URL}` учитывает фильтры списка произведений.'
+        )
+
+    def test_04_gzip(self, admin_client):
+        create_titles(admin_client)
+        plain = b''.join(admin_client.get(URL).streaming_content)
+        response = admin_client.get(URL, HTTP_ACCEPT_ENCODING='gzip, br')
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert gzip.decompress(
+            b''.join(response.streaming_content)
+        ) == plain, (
+            f'Проверьте, что `{URL}` сжимает выгрузку gzip на лету.'
+        )
+
+    def test_05_chunks(self, admin_client, settings):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Title
+
+        create_titles(admin_client)
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number}', year=2000)
+            for number in range(5)
+        )
+        settings.TITLES_EXPORT_CHUNK_SIZE = 2
+        response = admin_client.get(URL)
+        with CaptureQueriesContext(connection) as context:
+            lines = read_lines(response)
+        count = Title.objects.count()
+        assert len(lines) == count
+        genre_queries = [
+            query for query in context.captured_queries
+            if 'reviews_titlegenres' in query['sql']
+        ]
+        assert len(genre_queries) == math.ceil(count / 2), (
+            f'Проверьте, что `{URL}` читает произведения пачками '
+            '`TITLES_EXPORT_CHUNK_SIZE` и подгружает жанры одним запросом '
+            'на пачку.'
+        )
+
+    def test_06_chunk_within_query_params(self, admin_client, settings):
+        from django.db import connection
+
+        from api.export import get_chunk_size
+        from reviews.models import Title
+
+        Title.objects.bulk_create(
+            Title(name=f'Произведение {number}', year=2000)
+            for number in range(1200)
+        )
+        settings.TITLES_EXPORT_CHUNK_SIZE = 5000
+        response = admin_client.get(URL)
+        assert response.status_code == HTTPStatus.OK
+        lines = read_lines(response)
+        assert len(lines) == 1200
+        if connection.vendor == 'sqlite':
+            assert get_chunk_size(Title.objects.all(), 5000) < 999, (
+                'Проверьте, что пачка выгрузки не превышает число '
+                'параметров запроса, которое допускает SQLite.'
+            )
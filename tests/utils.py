@@ -1,5 +1,8 @@
+from contextlib import contextmanager
 from http import HTTPStatus
 
+from django.db import connection
+
 check_name_and_slug_patterns = (
     (
         {
@@ -304,3 +307,16 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+@contextmanager
+def record_query_params():
+    """Собирает число параметров каждого SQL-запроса внутри блока."""
+    counts = []
+
+    def wrapper(execute, sql, params, many, context):
+        counts.append(len(params or ()))
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counts